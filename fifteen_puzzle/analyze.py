@@ -1,10 +1,24 @@
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pathlib import Path
 import numpy as np
 
+from main import BOUNDED_METHODS
+from result_log import read_result_log
+
+BOUNDED_STATS = ['weight', 'budget_used', 'suboptimality_bound']
+
+# Parsed _stats.txt files are kept in this Feather file in the dataset directory,
+# with each file's modification time; later runs only parse new or changed files
+STATS_CACHE = '.stats_cache.feather'
+PARSE_BATCH = 512  # Files per parsing task
+
+METRICS = ['solution_length', 'visited', 'processed', 'depth_reached', 'time_ms']
+LOG_SCALE_METRICS = ['visited', 'processed', 'time_ms']  # Metrics that need log scale
+FULL_DPI = 300
+PREVIEW_DPI = 72
+
 def parse_filename(filename):
     parts = filename.replace('_stats.txt', '').split('_')
     return {
@@ -17,24 +31,78 @@ def parse_filename(filename):
 def read_stats_file(filepath):
     with open(filepath, 'r') as f:
         lines = f.readlines()
-    return {
+    stats = {
         'solution_length': int(lines[0]),
         'visited': int(lines[1]),
         'processed': int(lines[2]),
         'depth_reached': int(lines[3]),
         'time_ms': float(lines[4])
     }
+    # Results replayed from the solution cache were not timed (-1)
+    if stats['time_ms'] < 0:
+        stats['time_ms'] = np.nan
+    # Bounded-suboptimal methods (wastr, arastr, beam) add three lines; -1 means not applicable
+    for index, name in enumerate(BOUNDED_STATS, start=5):
+        value = float(lines[index]) if len(lines) > index else -1
+        stats[name] = value if value >= 0 else np.nan
+    return stats
+
+def parse_stats_files(directory, filenames):
+    return [{'file': filename, **parse_filename(filename), **read_stats_file(os.path.join(directory, filename))}
+            for filename in filenames]
 
-def load_dataset(directory):
-    data = []
+def read_stats_cache(path):
+    # The cached table, or None if there is none or it cannot be read
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_feather(path)
+    except (ImportError, OSError, ValueError):  # No pyarrow, or a damaged file
+        return None
+
+def load_dataset(directory, use_cache=True, workers=None):
+    with os.scandir(directory) as entries:
+        mtimes = {entry.name: entry.stat().st_mtime_ns for entry in entries
+                  if entry.name.endswith('_stats.txt') and entry.is_file()}
+    
+    # Reuse the cached rows of files that have not changed since
+    cache_path = os.path.join(directory, STATS_CACHE)
+    cached = read_stats_cache(cache_path) if use_cache else None
+    kept = cached[cached['file'].map(mtimes) == cached['mtime_ns']] if cached is not None else None
+    to_parse = sorted(set(mtimes) - set(kept['file'])) if kept is not None else sorted(mtimes)
     
-    for file in Path(directory).glob('*_stats.txt'):
-        filename = file.name
-        file_info = parse_filename(filename)
-        stats = read_stats_file(file)
-        data.append({**file_info, **stats})
+    # Reading the files is mostly waiting on the file system, so threads overlap
+    # it; each task parses a batch of files to keep the per-task overhead small
+    batches = [to_parse[start:start + PARSE_BATCH] for start in range(0, len(to_parse), PARSE_BATCH)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        parsed = executor.map(lambda batch: parse_stats_files(directory, batch), batches)
+        new = pd.DataFrame([row for rows in parsed for row in rows])
+    if len(new):
+        new['mtime_ns'] = new['file'].map(mtimes)
     
-    return pd.DataFrame(data)
+    frames = [frame for frame in (kept, new) if frame is not None and len(frame)]
+    df = pd.concat(frames, ignore_index=True).sort_values('file', ignore_index=True) if frames else new
+    
+    # Rewrite the cache when files were added, changed or removed
+    if use_cache and (cached is None or len(new) or len(kept) != len(cached)):
+        try:
+            df.to_feather(cache_path + '.tmp')
+            os.replace(cache_path + '.tmp', cache_path)
+        except ImportError:
+            print("Note: install pyarrow to cache the parsed statistics between runs")
+    
+    return df.drop(columns=['file', 'mtime_ns'], errors='ignore')
+
+def load_result_logs(paths):
+    # Same columns as load_dataset, from JSON-lines result logs; when a run was
+    # logged more than once, its last record wins
+    columns = ['depth', 'combination', 'method', 'strategy', 'solution_length', 'visited', 'processed',
+               'depth_reached', 'time_ms'] + BOUNDED_STATS
+    records = [record for path in paths for record in read_result_log(path)]
+    df = pd.DataFrame(records, columns=['instance'] + columns)
+    df = df.drop_duplicates(['instance', 'method', 'strategy'], keep='last')
+    df[['time_ms'] + BOUNDED_STATS] = df[['time_ms'] + BOUNDED_STATS].astype(float)
+    return df[columns].reset_index(drop=True)
 
 def calculate_detailed_statistics(df):
     metrics = ['solution_length', 'visited', 'processed', 'depth_reached', 'time_ms']
@@ -61,73 +129,93 @@ def calculate_detailed_statistics(df):
     
     return basic_stats, success_rate, method_stats, strategy_stats
 
-def create_boxplots(df, output_dir):
-    metrics = ['solution_length', 'visited', 'processed', 'depth_reached', 'time_ms']
-    log_scale_metrics = ['visited', 'processed', 'time_ms']  # Metrics that need log scale
+def pyplot():
+    # matplotlib and seaborn are only imported where a figure is drawn, so
+    # --stats-only runs never load them; figures are drawn off-screen
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+def plot_boxplot(df, metric, output_dir, dpi=FULL_DPI):
+    plt, sns = pyplot()
+    plt.figure(figsize=(12, 6))
     
-    for metric in metrics:
-        plt.figure(figsize=(12, 6))
+    if metric in LOG_SCALE_METRICS:
+        # Add small constant to handle zeros or negative values
+        plot_data = df.copy()
+        plot_data[metric] = plot_data[metric].apply(lambda x: x + 1e-10 if x <= 0 else x)
+        
+        plt.yscale('log', base=10)
+        sns.boxplot(data=plot_data, x='method', y=metric, hue='strategy')
         
-        if metric in log_scale_metrics:
-            # Add small constant to handle zeros or negative values
-            plot_data = df.copy()
-            plot_data[metric] = plot_data[metric].apply(lambda x: x + 1e-10 if x <= 0 else x)
-            
-            plt.yscale('log', base=10)
-            sns.boxplot(data=plot_data, x='method', y=metric, hue='strategy')
-            
-            # Format y-axis labels to show actual powers of 10
-            plt.gca().yaxis.set_major_formatter(plt.ScalarFormatter())
-            plt.gca().yaxis.set_major_formatter(
-                plt.FuncFormatter(lambda y, _: '{:,.0f}'.format(y))
-            )
-        else:
-            sns.boxplot(data=df, x='method', y=metric, hue='strategy')
-            
-        plt.title(f'{metric} by Method and Strategy\n{"(Log Scale)" if metric in log_scale_metrics else ""}')
-        plt.xticks(rotation=45)
-        plt.grid(True, which="both", ls="-", alpha=0.2)
+        # Format y-axis labels to show actual powers of 10
+        plt.gca().yaxis.set_major_formatter(plt.ScalarFormatter())
+        plt.gca().yaxis.set_major_formatter(
+            plt.FuncFormatter(lambda y, _: '{:,.0f}'.format(y))
+        )
+    else:
+        sns.boxplot(data=df, x='method', y=metric, hue='strategy')
         
-        # Add gridlines for log scale
-        if metric in log_scale_metrics:
-            plt.grid(True, which="minor", ls=":", alpha=0.2)
-            
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/{metric}_boxplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+    plt.title(f'{metric} by Method and Strategy\n{"(Log Scale)" if metric in LOG_SCALE_METRICS else ""}')
+    plt.xticks(rotation=45)
+    plt.grid(True, which="both", ls="-", alpha=0.2)
+    
+    # Add gridlines for log scale
+    if metric in LOG_SCALE_METRICS:
+        plt.grid(True, which="minor", ls=":", alpha=0.2)
+        
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/{metric}_boxplot.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-def create_heatmaps(stats_df, output_dir):
-    log_scale_metrics = ['visited', 'processed', 'time_ms']
+def plot_heatmap(means, metric, output_dir, dpi=FULL_DPI):
+    # means: mean of the metric indexed by (method, strategy)
+    plt, sns = pyplot()
     
     # Explicitly define the exact order we want for strategies
     strategy_order = ['hamm', 'manh']  # Start with these two
     # Add any remaining strategies in alphabetical order
-    other_strategies = sorted([s for s in stats_df.index.get_level_values('strategy').unique() 
+    other_strategies = sorted([s for s in means.index.get_level_values('strategy').unique() 
                              if s not in strategy_order])
     strategy_order.extend(other_strategies)
     
     # Get all available methods and sort them
-    all_methods = sorted(stats_df.index.get_level_values('method').unique())
+    all_methods = sorted(means.index.get_level_values('method').unique())
     
-    for metric in stats_df.columns.levels[0]:  # First level contains metric names
-        plt.figure(figsize=(12, 8))
-        pivot_table = stats_df[metric]['mean'].unstack()
-        
-        # Reorder the rows and columns with explicit ordering
-        pivot_table = pivot_table.reindex(index=all_methods, columns=strategy_order)
+    plt.figure(figsize=(12, 8))
+    pivot_table = means.unstack()
+    
+    # Reorder the rows and columns with explicit ordering
+    pivot_table = pivot_table.reindex(index=all_methods, columns=strategy_order)
+    
+    if metric in LOG_SCALE_METRICS:
+        # Apply log transformation for visualization
+        pivot_table_log = np.log10(pivot_table + 1e-10)
+        sns.heatmap(pivot_table_log, annot=pivot_table.values, 
+                   fmt='.2e', cmap='YlOrRd')
+    else:
+        sns.heatmap(pivot_table, annot=True, fmt='.2f', cmap='YlOrRd')
         
-        if metric in log_scale_metrics:
-            # Apply log transformation for visualization
-            pivot_table_log = np.log10(pivot_table + 1e-10)
-            sns.heatmap(pivot_table_log, annot=pivot_table.values, 
-                       fmt='.2e', cmap='YlOrRd')
-        else:
-            sns.heatmap(pivot_table, annot=True, fmt='.2f', cmap='YlOrRd')
-            
-        plt.title(f'{metric} Heatmap\n{"(Log Scale Values)" if metric in log_scale_metrics else ""}')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/{metric}_heatmap.png', dpi=300, bbox_inches='tight')
-        plt.close()
+    plt.title(f'{metric} Heatmap\n{"(Log Scale Values)" if metric in LOG_SCALE_METRICS else ""}')
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/{metric}_heatmap.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+def boxplot_figures(df, output_dir, dpi=FULL_DPI):
+    # (plot function, arguments) per figure; workers only get the columns they plot
+    return [(plot_boxplot, (df[['method', 'strategy', metric]], metric, output_dir, dpi)) for metric in METRICS]
+
+def heatmap_figures(stats_df, output_dir, dpi=FULL_DPI):
+    return [(plot_heatmap, (stats_df[metric]['mean'], metric, output_dir, dpi))
+            for metric in stats_df.columns.levels[0]]  # First level contains metric names
+
+def render_figures(figures, workers=None):
+    # Draws every (plot function, arguments) figure in a pool of worker processes
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(function, *arguments) for function, arguments in figures]:
+            future.result()
 
 def save_statistics_tables(basic_stats, success_rate, method_stats, strategy_stats, output_dir):    
     # Format and save basic statistics
@@ -151,13 +239,60 @@ def save_statistics_tables(basic_stats, success_rate, method_stats, strategy_sta
     # Save strategy-wise statistics
     strategy_stats.round(3).to_csv(f'{output_dir}/strategy_statistics.csv')
 
+def solved_with_length_ratio(df):
+    # Solved runs with their length relative to the shortest solution found
+    # for the same instance by any method
+    solved = df[df['solution_length'] > -1].copy()
+    shortest = solved.groupby(['depth', 'combination'])['solution_length'].transform('min')
+    solved['length_ratio'] = solved['solution_length'] / shortest.where(shortest > 0)
+    return solved
+
+def calculate_quality_vs_cost(df):
+    # Mean quality and cost of the bounded-suboptimal methods
+    solved = solved_with_length_ratio(df)
+    bounded = solved[solved['method'].isin(BOUNDED_METHODS)]
+    return bounded.groupby(['method', 'strategy'])[
+        ['length_ratio', 'processed', 'time_ms'] + BOUNDED_STATS
+    ].mean()
+
+def create_quality_vs_cost_plot(df, output_dir, dpi=FULL_DPI):
+    plt, sns = pyplot()
+    solved = solved_with_length_ratio(df)
+    
+    plt.figure(figsize=(12, 6))
+    sns.scatterplot(data=solved, x='processed', y='length_ratio', hue='method', style='strategy')
+    plt.xscale('log', base=10)
+    plt.title('Solution Quality vs Cost\n(length relative to the shortest solution found)')
+    plt.grid(True, which="both", ls="-", alpha=0.2)
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/quality_vs_cost.png', dpi=dpi, bbox_inches='tight')
+    plt.close()
+
 def main():
+    parser = argparse.ArgumentParser(description="Statistics and plots of the solver runs")
+    parser.add_argument('directory', nargs='?', default='dataset', help="directory with the _stats.txt files")
+    parser.add_argument('--result-log', nargs='+', metavar='FILE', default=None,
+                        help="read these JSON-lines result logs (batch.py/main.py --result-log) instead")
+    parser.add_argument('--workers', type=int, default=None, help="threads parsing the _stats.txt files")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"parse every _stats.txt file, neither reading nor updating {STATS_CACHE}")
+    parser.add_argument('--stats-only', action='store_true',
+                        help="write the statistics tables only, without plots (and without importing matplotlib)")
+    parser.add_argument('--preview', action='store_true',
+                        help=f"draw the plots at {PREVIEW_DPI} instead of {FULL_DPI} DPI")
+    parser.add_argument('--plot-workers', type=int, default=None,
+                        help="processes drawing the plots (default: CPU count)")
+    args = parser.parse_args()
+    
     # Create output directory for plots and statistics
     output_dir = 'analysis_results'
     os.makedirs(output_dir, exist_ok=True)
     
     # Load and process data
-    df = load_dataset('dataset')
+    if args.result_log:
+        df = load_result_logs(args.result_log)
+    else:
+        df = load_dataset(args.directory, use_cache=not args.no_cache, workers=args.workers)
     
     # Calculate detailed statistics
     basic_stats, success_rate, method_stats, strategy_stats = calculate_detailed_statistics(df)
@@ -165,9 +300,20 @@ def main():
     # Save all statistics tables
     save_statistics_tables(basic_stats, success_rate, method_stats, strategy_stats, output_dir)
     
-    # Create visualizations
-    create_boxplots(df, output_dir)
-    create_heatmaps(basic_stats, output_dir)
+    # Create visualizations, each figure in its own worker process
+    dpi = PREVIEW_DPI if args.preview else FULL_DPI
+    figures = boxplot_figures(df, output_dir, dpi) + heatmap_figures(basic_stats, output_dir, dpi)
+    
+    # Quality against cost, when bounded-suboptimal methods were run
+    if df['method'].isin(BOUNDED_METHODS).any():
+        quality = calculate_quality_vs_cost(df)
+        quality.round(3).to_csv(f'{output_dir}/quality_vs_cost.csv')
+        figures.append((create_quality_vs_cost_plot, (df, output_dir, dpi)))
+        print("\nBounded-suboptimal Methods (Mean Values):")
+        print(quality.round(3))
+    
+    if not args.stats_only:
+        render_figures(figures, args.plot_workers)
     
     # Print summary to console
     print("\nSuccess Rate by Method and Strategy:")
@@ -0,0 +1,296 @@
+import argparse
+import os
+import re
+import signal
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from board import Board
+from helpers import read_board, write_solution_file, write_info_file
+from heuristics import HEURISTICS
+from main import SEARCH_METHODS, HEURISTIC_METHODS, BOUNDED_METHODS, is_cacheable, run_search
+from result_log import ResultLog, logged_runs, result_record
+from search_methods import SearchMethod, DEFAULT_TRANSPOSITION_SIZE
+from solution_cache import CachedResult, SolutionCache, method_key, DEFAULT_MAX_ENTRIES
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Batch replacement for data/generate_solutions.ps1: every instance file is read
+# once and every (instance, method, strategy) job runs in a process pool. The
+# output files use the same names as the PowerShell script, so analyze.py and
+# the validator work unchanged, and jobs whose outputs exist are skipped.
+# With a result log every finished job is also appended to one JSON-lines
+# file; with --log-only the per-job files are not written at all.
+#
+# A worker that dies (e.g. killed by the OOM killer) breaks the pool and fails
+# every job still in it. Those jobs get up to POOL_RESTARTS fresh pools; after
+# that each one runs alone, so only the job that crashes is recorded as
+# 'crashed'. Crashed jobs get no output files, so a restart runs them again.
+
+ORDERS = ['RDUL', 'RDLU', 'DRUL', 'DRLU', 'LUDR', 'LURD', 'ULDR', 'ULRD']
+DEFAULT_HEURISTICS = ['hamm', 'manh']
+INSTANCE_FILENAME = re.compile(r'^[a-zA-Z0-9]+_[0-9]+_[0-9]+\.txt$')
+
+POOL_RESTARTS = 2
+# Jobs that ran to the end; a restart skips them
+FINISHED_STATUSES = ('ok', 'cached')
+# Jobs stopped by a limit; a restart skips them unless --retry-limited is given
+LIMIT_STATUSES = ('time limit', 'memory limit')
+
+# (board elements, instance name, method, strategy, solution file, info file);
+# the files are None when only the result log is written
+Job = Tuple[List[List[int]], str, str, str, Optional[str], Optional[str]]
+
+class SearchTimeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise SearchTimeout()
+
+def init_worker(memory_limit_mb: Optional[int]):
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def solve_job(job: Job, time_limit: Optional[float] = None, search_options: Optional[dict] = None,
+              cache_path: Optional[str] = None,
+              cache_size: int = DEFAULT_MAX_ENTRIES) -> Tuple[CachedResult, str]:
+    elements, _, method, strategy, solution_file, info_file = job
+    board = Board(elements)
+
+    cache = SolutionCache(cache_path, cache_size) if cache_path else None
+    try:
+        result, status = solve_board(board, method, strategy, time_limit, search_options, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if solution_file is not None:
+        write_solution_file(result.moves, solution_file)
+        write_info_file(result.moves, result.visited, result.processed, result.max_depth,
+                        result.duration_ms, info_file, result.bounded_stats)
+    return result, status
+
+def solve_board(board: Board, method: str, strategy: str, time_limit: Optional[float] = None,
+                search_options: Optional[dict] = None,
+                cache: Optional[SolutionCache] = None) -> Tuple[CachedResult, str]:
+    # Returns the cached result if there is one (status 'cached'), else searches.
+    # Results of the bounded-suboptimal methods and of parallel A* are not cached.
+    if not is_cacheable(method, search_options or {}):
+        cache = None
+    cache_method = method_key(method, search_options or {})
+    result = cache.get(board, cache_method, strategy) if cache is not None else None
+    if result is not None:
+        return result, 'cached'
+
+    result, status = search_job(board, method, strategy, time_limit, search_options)
+    # Searches stopped by a limit are not final results
+    if cache is not None and status == 'ok':
+        cache.put(board, cache_method, strategy, result)
+    return result, status
+
+def search_job(board: Board, method: str, strategy: str, time_limit: Optional[float] = None,
+               search_options: Optional[dict] = None) -> Tuple[CachedResult, str]:
+    search_method = SearchMethod(strategy, **(search_options or {}))
+    status = 'ok'
+
+    use_alarm = time_limit and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+
+    start_time = time.perf_counter()
+    try:
+        (solution, solution_path), duration_ms = run_search(search_method, board, method)
+        moves_sequence = solution_path if solution is not None else None
+    except SearchTimeout:
+        moves_sequence, status = None, 'time limit'
+    except MemoryError:
+        moves_sequence, status = None, 'memory limit'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    if status != 'ok':
+        duration_ms = (time.perf_counter() - start_time) * 1000
+
+    bounded_stats = None
+    if method in BOUNDED_METHODS:
+        bounded_stats = (search_method.weight_used, search_method.budget_used, search_method.suboptimality_bound)
+    return CachedResult(moves_sequence, search_method.visited_count, search_method.processed_count,
+                        search_method.max_depth, duration_ms, bounded_stats), status
+
+def _no_solution(solution_file: str) -> bool:
+    # A solution file reporting -1: stopped by a limit, or no solution found
+    with open(solution_file) as f:
+        return f.readline().strip() == "-1"
+
+def collect_jobs(directory: str, methods: List[str], strategies: Optional[List[str]],
+                 force: bool = False, result_log: Optional[str] = None,
+                 log_only: bool = False, retry_limited: bool = False) -> Tuple[List[Job], int]:
+    # With `log_only` a job is done when its last record in the result log is
+    # finished (or stopped by a limit), otherwise when both of its output files
+    # exist. With `retry_limited` jobs stopped by a limit are run again; only
+    # the result log tells them apart, so in file mode every job whose solution
+    # file reports -1 is.
+    instances = sorted(path for path in Path(directory).iterdir()
+                       if path.is_file() and INSTANCE_FILENAME.match(path.name))
+    logged = logged_runs(result_log) if log_only and not force else {}
+    done_statuses = FINISHED_STATUSES if retry_limited else FINISHED_STATUSES + LIMIT_STATUSES
+    jobs, skipped = [], 0
+
+    for path in instances:
+        elements = read_board(str(path))
+        if elements is None:
+            continue
+        for method in methods:
+            if method in HEURISTIC_METHODS:
+                method_strategies = [s for s in (strategies or DEFAULT_HEURISTICS) if s.lower() in HEURISTICS]
+            else:
+                method_strategies = [s for s in (strategies or ORDERS) if s.lower() not in HEURISTICS]
+            for strategy in method_strategies:
+                if log_only:
+                    if logged.get((path.stem, method, strategy.lower())) in done_statuses:
+                        skipped += 1
+                        continue
+                    jobs.append((elements, path.stem, method, strategy, None, None))
+                    continue
+                root = path.with_name(f"{path.stem}_{method}_{strategy.lower()}")
+                solution_file, info_file = f"{root}_sol.txt", f"{root}_stats.txt"
+                if (not force and os.path.exists(solution_file) and os.path.exists(info_file)
+                        and not (retry_limited and _no_solution(solution_file))):
+                    skipped += 1
+                    continue
+                jobs.append((elements, path.stem, method, strategy, solution_file, info_file))
+
+    return jobs, skipped
+
+def _run_pool(jobs: List[Job], workers: Optional[int], time_limit: Optional[float],
+              memory_limit_mb: Optional[int], search_options: Optional[dict], cache_path: Optional[str],
+              cache_size: int) -> Iterator[Tuple[Job, Optional[CachedResult], str]]:
+    # Yields (job, result, status) as the jobs finish; a job lost with a broken
+    # pool has status 'crashed', one whose worker raised has status 'error'
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(memory_limit_mb,)) as executor:
+        futures = {executor.submit(solve_job, job, time_limit, search_options, cache_path, cache_size): job
+                   for job in jobs}
+        for future in as_completed(futures):
+            try:
+                result, status = future.result()
+            except BrokenProcessPool:
+                result, status = None, 'crashed'
+            except Exception as e:
+                _, instance, method, strategy, _, _ = futures[future]
+                print(f"{instance}_{method}_{strategy.lower()} failed: {e!r}")
+                result, status = None, 'error'
+            yield futures[future], result, status
+
+def run_batch(jobs: List[Job], workers: Optional[int] = None, time_limit: Optional[float] = None,
+              memory_limit_mb: Optional[int] = None, search_options: Optional[dict] = None,
+              cache_path: Optional[str] = None, cache_size: int = DEFAULT_MAX_ENTRIES,
+              result_log: Optional[str] = None) -> Counter:
+    # Returns the number of jobs per status
+    statuses = Counter()
+    if cache_path:
+        SolutionCache.prepare(cache_path)
+    # Only this process appends to the log, in the order the jobs finish
+    log = ResultLog(result_log) if result_log else None
+    try:
+        pending, restarts = jobs, 0
+        while pending:
+            isolated = restarts >= POOL_RESTARTS
+            lost = []
+            # After POOL_RESTARTS, every remaining job gets a pool of its own
+            for pool_jobs in ([[job] for job in pending] if isolated else [pending]):
+                for job, result, status in _run_pool(pool_jobs, 1 if isolated else workers, time_limit,
+                                                     memory_limit_mb, search_options, cache_path, cache_size):
+                    if status == 'crashed' and not isolated:
+                        lost.append(job)
+                        continue
+                    _, instance, method, strategy, _, _ = job
+                    if result is None:
+                        result = CachedResult(None, 0, 0, 0, None)
+                    if log is not None:
+                        log.write(result_record(instance, method, strategy, result, status))
+                    statuses[status] += 1
+                    length = f"{len(result.moves)} moves" if result.moves is not None else "no solution"
+                    note = f" ({status})" if status != 'ok' else ""
+                    print(f"[{sum(statuses.values())}/{len(jobs)}] {instance}_{method}_{strategy.lower()}: "
+                          f"{length}{note}")
+            if lost:
+                print(f"A worker process died; running the {len(lost)} jobs it took down again")
+            pending, restarts = lost, restarts + 1
+    finally:
+        if log is not None:
+            log.close()
+    return statuses
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve every size_depth_id.txt instance in a directory "
+                                                 "with the selected methods and strategies")
+    parser.add_argument('directory', help="directory with the instance files; outputs are written next to them")
+    parser.add_argument('--methods', nargs='+', default=['bfs', 'dfs', 'astr'], choices=SEARCH_METHODS,
+                        help="search methods to run (default: bfs dfs astr)")
+    parser.add_argument('--strategies', nargs='+', default=None,
+                        help=f"move orders and/or heuristics to use (default: {' '.join(ORDERS)} "
+                             f"for blind methods, {' '.join(DEFAULT_HEURISTICS)} for heuristic ones)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--time-limit', type=float, default=None, help="seconds per job")
+    parser.add_argument('--memory-limit', type=int, default=None, help="address space per worker in MB")
+    parser.add_argument('--bfs-backend', choices=['deque', 'numpy', 'disk'], default='deque',
+                        help="BFS engine passed on to SearchMethod")
+    parser.add_argument('--bfs-memory', type=int, default=256, help="RAM budget of a disk BFS job in MB")
+    parser.add_argument('--bfs-dir', metavar='DIR', default=None, help="directory for the disk BFS layer files")
+    parser.add_argument('--open-list', choices=['heap', 'buckets'], default='heap',
+                        help="A* open list passed on to SearchMethod")
+    parser.add_argument('--astar-workers', type=int, default=1,
+                        help="worker processes per A* job (hash-distributed parallel A*)")
+    parser.add_argument('--weight', type=float, default=2.0,
+                        help="heuristic weight of wastr, initial weight of arastr")
+    parser.add_argument('--beam-width', type=int, default=1000, help="nodes kept per layer by beam search")
+    parser.add_argument('--node-budget', type=int, default=None, help="processed nodes per wastr/arastr/beam job")
+    parser.add_argument('--time-budget', type=float, default=None, help="seconds per wastr/arastr/beam job")
+    parser.add_argument('--table-size', type=int, default=DEFAULT_TRANSPOSITION_SIZE,
+                        help="slots in the IDDFS transposition table")
+    parser.add_argument('--force', action='store_true', help="rerun jobs whose output files already exist")
+    parser.add_argument('--retry-limited', action='store_true',
+                        help="rerun jobs stopped by a time or memory limit (without --log-only: every job "
+                             "whose solution file reports -1)")
+    parser.add_argument('--result-log', metavar='FILE', default=None,
+                        help="also append every result to this JSON-lines file, which analyze.py can read")
+    parser.add_argument('--log-only', action='store_true',
+                        help="write only the result log, no _sol.txt/_stats.txt files; "
+                             "jobs already in the log are skipped")
+    parser.add_argument('--cache', metavar='FILE', default=None,
+                        help="reuse finished searches from this SQLite file and store new ones (off by default)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="maximum number of cached results; least recently used ones are evicted")
+    args = parser.parse_args()
+
+    if args.time_limit and not hasattr(signal, 'setitimer'):
+        print("Warning: --time-limit is not supported on this platform and will be ignored")
+    if args.memory_limit and resource is None:
+        print("Warning: --memory-limit is not supported on this platform and will be ignored")
+
+    if args.log_only and not args.result_log:
+        parser.error("--log-only requires --result-log")
+
+    jobs, skipped = collect_jobs(args.directory, args.methods, args.strategies, args.force,
+                                 args.result_log, args.log_only, args.retry_limited)
+    print(f"{len(jobs)} jobs to run, {skipped} already done")
+    statuses = run_batch(jobs, args.workers, args.time_limit, args.memory_limit,
+                       {'bfs_backend': args.bfs_backend, 'bfs_memory_mb': args.bfs_memory,
+                        'bfs_directory': args.bfs_dir, 'open_list': args.open_list,
+                        'transposition_size': args.table_size, 'workers': args.astar_workers,
+                        'weight': args.weight, 'beam_width': args.beam_width,
+                        'node_budget': args.node_budget, 'time_budget': args.time_budget},
+                       args.cache, args.cache_size, args.result_log)
+    print(f"Finished: {statuses['ok'] + statuses['cached']} completed, "
+          f"{sum(statuses[status] for status in LIMIT_STATUSES)} stopped by a limit, "
+          f"{statuses['crashed'] + statuses['error']} failed")
@@ -0,0 +1,198 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import signal
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from board import Board, get_layout
+from heuristics import HEURISTICS, create_heuristic
+from main import SEARCH_METHODS, HEURISTIC_METHODS, run_search
+from search_methods import SearchMethod
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Solver throughput benchmark. Every (instance, method, strategy) case runs in a
+# fresh process, so the peak RSS belongs to that case alone, and is stopped
+# after a time budget; nodes/sec is then taken over the work done so far. The
+# instances are seeded random walks on the 4x4 board, so every run of the
+# suite measures exactly the same searches.
+
+DEFAULT_DEPTHS = [5, 10, 15, 20, 25]
+DEFAULT_ORDER = 'RDUL'
+SEED = 2024
+
+# (case id, board elements, method, strategy, SearchMethod options)
+Case = Tuple[str, List[List[int]], str, str, dict]
+
+class BudgetExceeded(Exception):
+    pass
+
+def _raise_budget(signum, frame):
+    raise BudgetExceeded()
+
+def benchmark_instances(depths: List[int], per_depth: int, seed: int = SEED) -> List[Tuple[str, List[List[int]]]]:
+    layout = get_layout(4, 4)
+    rng = random.Random(seed)
+    instances = []
+    for depth in depths:
+        for number in range(1, per_depth + 1):
+            # Random walk that never undoes its previous move
+            state, blank, previous = layout.goal_state, layout.goal_blank, None
+            for _ in range(depth):
+                target = rng.choice([cell for cell in layout.neighbors(blank) if cell != previous])
+                state, previous, blank = layout.apply_move(state, blank, target), blank, target
+            board = Board.from_state(layout, state, blank)
+            instances.append((f"4x4_{depth:02d}_{number:05d}", board.to_elements()))
+    return instances
+
+def benchmark_cases(instances: List[Tuple[str, List[List[int]]]], methods: List[str],
+                    heuristics: List[str]) -> List[Case]:
+    cases = []
+    for name, elements in instances:
+        for method in methods:
+            if method in HEURISTIC_METHODS:
+                for heuristic in heuristics:
+                    cases.append((f"{name}:{method}:{heuristic}", elements, method, heuristic, {}))
+                    if method == 'astr':
+                        cases.append((f"{name}:{method}:{heuristic}:buckets", elements, method, heuristic,
+                                      {'open_list': 'buckets'}))
+            else:
+                cases.append((f"{name}:{method}:{DEFAULT_ORDER.lower()}", elements, method, DEFAULT_ORDER, {}))
+                if method == 'bfs':
+                    cases.append((f"{name}:{method}:{DEFAULT_ORDER.lower()}:numpy", elements, method,
+                                  DEFAULT_ORDER, {'bfs_backend': 'numpy'}))
+    return cases
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_case(case: Case, time_budget: float) -> Dict:
+    case_id, elements, method, strategy, options = case
+    board = Board(elements)
+    search_method = SearchMethod(strategy, **options)
+    completed = True
+
+    # Build lookup tables and warm up NumPy up front; only the search is timed
+    if method in HEURISTIC_METHODS:
+        create_heuristic(strategy.lower(), board.layout)
+    if options.get('bfs_backend') == 'numpy':
+        # A search one move from the goal imports NumPy and runs every step of a layer
+        layout = board.layout
+        target = layout.neighbors(layout.goal_blank)[0]
+        warm_up = Board.from_state(layout, layout.apply_move(layout.goal_state, layout.goal_blank, target), target)
+        SearchMethod(strategy, bfs_backend='numpy').bfs(warm_up)
+
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGALRM, _raise_budget)
+        signal.setitimer(signal.ITIMER_REAL, time_budget)
+
+    start_time = time.perf_counter()
+    try:
+        (solution, solution_path), _ = run_search(search_method, board, method)
+    except BudgetExceeded:
+        solution, solution_path, completed = None, "", False
+    finally:
+        wall_time = time.perf_counter() - start_time
+        if hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return {
+        'case': case_id,
+        'completed': completed,
+        'solution_length': len(solution_path) if solution is not None else -1,
+        'visited': search_method.visited_count,
+        'processed': search_method.processed_count,
+        'wall_time_s': round(wall_time, 6),
+        'nodes_per_sec': round(search_method.processed_count / wall_time, 1) if wall_time > 0 else 0.0,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+def run_suite(cases: List[Case], time_budget: float) -> List[Dict]:
+    results = []
+    # One case per fresh worker process, one at a time, so timings do not compete
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        for case in cases:
+            result = pool.apply(run_case, (case, time_budget))
+            results.append(result)
+            rss = f"{result['peak_rss_mb']:.1f} MB" if result['peak_rss_mb'] is not None else "n/a"
+            note = "" if result['completed'] else " (budget)"
+            print(f"{result['case']:<32} {result['nodes_per_sec']:>12,.0f} nodes/s "
+                  f"{result['wall_time_s']:>9.3f} s {rss:>10}{note}")
+    return results
+
+def compare(results: List[Dict], baseline: Dict, threshold: float, min_time: float) -> List[str]:
+    baseline_results = {result['case']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        reference = baseline_results.get(result['case'])
+        # Cases that finish within a few milliseconds are too noisy to compare
+        if reference is None or not reference['nodes_per_sec'] or reference['wall_time_s'] < min_time:
+            continue
+        ratio = result['nodes_per_sec'] / reference['nodes_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append(f"{result['case']}: {result['nodes_per_sec']:,.0f} nodes/s vs "
+                               f"{reference['nodes_per_sec']:,.0f} in baseline ({ratio - 1:+.1%})")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark solver throughput on a fixed set of seeded instances")
+    parser.add_argument('--output', default='benchmark_results.json', help="file to write the results to")
+    parser.add_argument('--compare', metavar='BASELINE', default=None,
+                        help="baseline results file; exit with status 1 if throughput regressed")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed relative drop in nodes/sec before a case counts as a regression")
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help="ignore cases whose baseline wall time is shorter than this (seconds)")
+    parser.add_argument('--time-budget', type=float, default=10.0, help="seconds per case")
+    parser.add_argument('--depths', type=int, nargs='+', default=DEFAULT_DEPTHS)
+    parser.add_argument('--per-depth', type=int, default=2, help="instances per depth")
+    parser.add_argument('--methods', nargs='+', default=SEARCH_METHODS, choices=SEARCH_METHODS)
+    parser.add_argument('--heuristics', nargs='+', default=None,
+                        help="heuristics for astr/idas (default: all registered; pdb only if its tables exist)")
+    args = parser.parse_args()
+
+    heuristics = args.heuristics
+    if heuristics is None:
+        heuristics = [name for name in HEURISTICS if name != 'pdb']
+        try:
+            HEURISTICS['pdb'](get_layout(4, 4))
+            heuristics.append('pdb')
+        except FileNotFoundError:
+            print("Skipping 'pdb': pattern database tables have not been built")
+
+    cases = benchmark_cases(benchmark_instances(args.depths, args.per_depth), args.methods, heuristics)
+    print(f"Running {len(cases)} cases with a {args.time_budget:g} s budget each")
+    results = run_suite(cases, args.time_budget)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': SEED,
+            'time_budget_s': args.time_budget,
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_time)
+        if regressions:
+            print(f"\n{len(regressions)} throughput regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo throughput regressions beyond {args.threshold:.0%}")
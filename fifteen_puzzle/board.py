@@ -1,105 +1,186 @@
+from functools import lru_cache
+
+# Directions the blank can move in; a move's index here is its 2-bit move code
+MOVES = "LRUD"
+# Translation table turning a move string into the moves that undo each step
+INVERSE_MOVES = str.maketrans("LRUD", "RLDU")
+# Move code standing for "no previous move" (the root of a search); a move's
+# inverse is code ^ 1, as L/R and U/D are adjacent in MOVES
+NO_MOVE = 4
+
 class PuzzleElement:
     def __init__(self, value: int):
         self.value = value
-    
+
     def is_empty(self) -> bool:
         return self.value == 0
-    
+
     def __str__(self) -> str:
         return str(self.value) if not self.is_empty() else " "
 
+class BoardLayout:
+    # Packed state encoding shared by all boards of one shape. Tiles are stored
+    # in row-major order, `bits` bits per cell, cell 0 in the lowest bits. A 4x4
+    # board fits into a single 64-bit integer (4 bits per tile); larger boards
+    # use wider cells in an arbitrary-precision int, so the state stays hashable.
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.size = height * width
+        self.bits = max(4, (self.size - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.goal_blank = self.size - 1
+        self.goal_state = self.pack(list(range(1, self.size)) + [0])
+        self._move_tables = {}
+
+    def pack(self, values: list[int]) -> int:
+        state = 0
+        for index, value in enumerate(values):
+            state |= value << (index * self.bits)
+        return state
+
+    def unpack(self, state: int) -> list[int]:
+        bits, mask = self.bits, self.mask
+        return [(state >> (index * bits)) & mask for index in range(self.size)]
+
+    def tile_at(self, state: int, index: int) -> int:
+        return (state >> (index * self.bits)) & self.mask
+
+    def position(self, index: int) -> tuple[int, int]:
+        return divmod(index, self.width)
+
+    def index(self, row: int, col: int) -> int:
+        return row * self.width + col
+
+    def apply_move(self, state: int, blank: int, target: int) -> int:
+        # The blank cell holds 0, so moving the tile from `target` into `blank`
+        # is two XORs: clear it at its old cell and set it at the new one.
+        shift = target * self.bits
+        tile = (state >> shift) & self.mask
+        return state ^ (tile << shift) ^ (tile << (blank * self.bits))
+
+    def moves(self, blank: int, search_strategy: str = "LRUD") -> list[tuple[int, int]]:
+        row, col = divmod(blank, self.width)
+        moves = []
+
+        # Add moves in the order specified by the search strategy as (target cell, move code)
+        for direction in search_strategy.upper():
+            if direction == 'L' and col > 0:
+                moves.append((blank - 1, 0))
+            elif direction == 'R' and col < self.width - 1:
+                moves.append((blank + 1, 1))
+            elif direction == 'U' and row > 0:
+                moves.append((blank - self.width, 2))
+            elif direction == 'D' and row < self.height - 1:
+                moves.append((blank + self.width, 3))
+
+        return moves
+
+    def move_table(self, search_strategy: str = "LRUD") -> list[list[tuple]]:
+        # table[blank][last move code] = the legal (target cell, move code) pairs
+        # in strategy order, without the move that undoes the last one; index
+        # NO_MOVE keeps all of them. Built once per layout and move order, so the
+        # search loops do no string parsing or reverse-move checks per node.
+        search_strategy = search_strategy.upper()
+        table = self._move_tables.get(search_strategy)
+        if table is None:
+            table = []
+            for blank in range(self.size):
+                moves = self.moves(blank, search_strategy)
+                table.append([tuple((target, code) for target, code in moves if code != last ^ 1)
+                              for last in range(NO_MOVE)] + [tuple(moves)])
+            self._move_tables[search_strategy] = table
+        return table
+
+    def neighbors(self, blank: int, search_strategy: str = "LRUD") -> list[int]:
+        return [target for target, _ in self.move_table(search_strategy)[blank][NO_MOVE]]
+
+    def is_solvable(self, state: int, blank: int) -> bool:
+        values = self.unpack(state)
+        if sorted(values) != list(range(self.size)):
+            return False  # Missing or repeated tiles can never form the goal
+
+        tiles = [value for value in values if value]
+        inversions = sum(1 for i in range(len(tiles)) for j in range(i + 1, len(tiles))
+                         if tiles[i] > tiles[j])
+
+        # A single row or column can only shift the blank, never reorder tiles
+        if self.width == 1 or self.height == 1:
+            return inversions == 0
+        # Horizontal moves keep the inversion count; vertical moves change it by
+        # width - 1. With an odd width its parity is invariant, with an even width
+        # inversions + blank row keeps its parity.
+        if self.width % 2 == 1:
+            return inversions % 2 == 0
+        return (inversions + blank // self.width) % 2 == (self.height - 1) % 2
+
+@lru_cache(maxsize=None)
+def get_layout(height: int, width: int) -> BoardLayout:
+    return BoardLayout(height, width)
+
 class Board:
+    # Thin view over a packed state, used for I/O and printing. The search
+    # methods work on `state`/`empty_index` directly through `layout`.
     def __init__(self, elements: list[list[int]]):
-        self.height = len(elements)
-        self.width = len(elements[0])
-        
+        height = len(elements)
+        width = len(elements[0])
+
         # Validate input dimensions
-        if not all(len(row) == self.width for row in elements):
+        if not all(len(row) == width for row in elements):
             raise ValueError("All rows must have the same length")
-            
-        # Create board with PuzzleElements
-        self.board = []
-        self.empty_position = None
-        
-        for i, row in enumerate(elements):
-            board_row = []
-            for j, value in enumerate(row):
-                element = PuzzleElement(value)
-                board_row.append(element)
-                if element.is_empty():
-                    self.empty_position = (i, j)
-            self.board.append(board_row)
-            
-        if self.empty_position is None:
+
+        values = [value for row in elements for value in row]
+        if 0 not in values:
             raise ValueError("Board must contain exactly one empty space (0)")
-    
+
+        self.layout = get_layout(height, width)
+        self.height = height
+        self.width = width
+        self.state = self.layout.pack(values)
+        self.empty_index = values.index(0)
+
+    @classmethod
+    def from_state(cls, layout: BoardLayout, state: int, empty_index: int) -> 'Board':
+        board = cls.__new__(cls)
+        board.layout = layout
+        board.height = layout.height
+        board.width = layout.width
+        board.state = state
+        board.empty_index = empty_index
+        return board
+
+    @property
+    def empty_position(self) -> tuple[int, int]:
+        return self.layout.position(self.empty_index)
+
     def get_element(self, row: int, col: int) -> PuzzleElement:
-        return self.board[row][col]
-    
+        return PuzzleElement(self.layout.tile_at(self.state, self.layout.index(row, col)))
+
+    def to_elements(self) -> list[list[int]]:
+        values = self.layout.unpack(self.state)
+        return [values[i:i + self.width] for i in range(0, self.layout.size, self.width)]
+
     def __str__(self) -> str:
         result = []
-        for row in self.board:
-            row_str = " ".join(str(element).rjust(2) for element in row)
+        for row in self.to_elements():
+            row_str = " ".join(str(PuzzleElement(value)).rjust(2) for value in row)
             result.append(row_str)
         return "\n".join(result)
-    
+
     def get_possible_moves(self, search_strategy: str = "LRUD") -> list[tuple[int, int]]:
-        empty_row, empty_col = self.empty_position
-        possible_moves = []
-        
-        # Define all possible moves
-        all_moves = {
-            'L': (empty_row, empty_col - 1),  # Left
-            'R': (empty_row, empty_col + 1),  # Right
-            'U': (empty_row - 1, empty_col),  # Up
-            'D': (empty_row + 1, empty_col)   # Down
-        }
-        
-        # Add moves in the order specified by the search strategy
-        for direction in search_strategy.upper():
-            if direction in all_moves:
-                new_row, new_col = all_moves[direction]
-                # Check if the move is valid (within board boundaries)
-                if 0 <= new_row < self.height and 0 <= new_col < self.width:
-                    possible_moves.append((new_row, new_col))
-        
-        return possible_moves
-    
+        return [self.layout.position(target)
+                for target, _ in self.layout.move_table(search_strategy)[self.empty_index][NO_MOVE]]
+
     def make_move(self, new_empty_pos: tuple[int, int]) -> 'Board':
-        empty_row, empty_col = self.empty_position
-        new_row, new_col = new_empty_pos
-        
-        # Create a deep copy of the board
-        new_elements = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                if i == empty_row and j == empty_col:
-                    # This is the old empty position, should now contain the value from the new position
-                    row.append(self.get_element(new_row, new_col).value)
-                elif i == new_row and j == new_col:
-                    # This is the new empty position
-                    row.append(0)
-                else:
-                    # Keep the original value
-                    row.append(self.get_element(i, j).value)
-            new_elements.append(row)
-        
-        return Board(new_elements)
-    
+        target = self.layout.index(*new_empty_pos)
+        new_state = self.layout.apply_move(self.state, self.empty_index, target)
+        return Board.from_state(self.layout, new_state, target)
+
+    def is_solvable(self) -> bool:
+        return self.layout.is_solvable(self.state, self.empty_index)
+
     def is_solved(self) -> bool:
-        expected_value = 1
-        for i in range(self.height):
-            for j in range(self.width):
-                if i == self.height - 1 and j == self.width - 1:
-                    # Last position should be empty
-                    if not self.get_element(i, j).is_empty():
-                        return False
-                else:
-                    if self.get_element(i, j).value != expected_value:
-                        return False
-                    expected_value += 1
-        return True
-    
-    def get_state_key(self) -> str:
-        return str(self) 
\ No newline at end of file
+        return self.state == self.layout.goal_state
+
+    def get_state_key(self) -> int:
+        return self.state
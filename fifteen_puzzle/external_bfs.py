@@ -0,0 +1,238 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from board import BoardLayout, MOVES, get_layout
+from vectorized_bfs import _move_tables
+
+# External-memory breadth-first search for boards of at most 16 cells. Every
+# depth layer is a file of sorted, unique uint64 states on disk, so only the
+# memory budget, not the number of visited states, is held in RAM:
+#
+# 1. The current layer is read in chunks; the successors of each chunk are
+#    sorted, deduplicated and written as one sorted run file.
+# 2. The runs are merged block by block into the next layer file. Duplicate
+#    detection is delayed to this merge: states equal across runs are written
+#    once, and states of the previous layer are dropped while it is streamed
+#    alongside. The state graph is bipartite, so a successor of layer d is in
+#    layer d - 1 or d + 1 and the previous layer is the only one to check.
+#
+# Layer files only hold states; the blank is the cell whose nibble is 0. The
+# solution path is recovered by walking back from the goal: at every layer one
+# neighbour of the current state is found by binary search in the memory-mapped
+# layer file.
+
+DEFAULT_MEMORY_MB = 256
+
+# Working memory per parent state while a chunk is expanded: the chunk, blanks,
+# up to four successors and the sort buffers of np.unique
+BYTES_PER_PARENT = 160
+
+_EMPTY = np.empty(0, dtype=np.uint64)
+
+class _SortedReader:
+    # Reads a sorted uint64 file sequentially, one block at a time
+    def __init__(self, path: str, block: int):
+        self.file = open(path, 'rb')
+        self.block = block
+        self.buffer = _EMPTY
+        self._fill()
+
+    def _fill(self):
+        if not self.buffer.size and not self.file.closed:
+            self.buffer = np.fromfile(self.file, dtype=np.uint64, count=self.block)
+            if not self.buffer.size:
+                self.file.close()
+
+    def last(self) -> Optional[np.uint64]:
+        return self.buffer[-1] if self.buffer.size else None
+
+    def take_upto(self, bound: np.uint64) -> np.ndarray:
+        # Removes and returns all remaining values <= bound
+        pieces = []
+        while self.buffer.size:
+            end = int(np.searchsorted(self.buffer, bound, side='right'))
+            pieces.append(self.buffer[:end])
+            self.buffer = self.buffer[end:]
+            if self.buffer.size:
+                break
+            self._fill()
+        return np.concatenate(pieces) if pieces else _EMPTY
+
+    def close(self):
+        self.file.close()
+
+def _blanks(states: np.ndarray, size: int) -> np.ndarray:
+    blanks = np.zeros(states.size, dtype=np.int64)
+    for cell in range(size):
+        blanks[((states >> np.uint64(4 * cell)) & np.uint64(15)) == 0] = cell
+    return blanks
+
+def _successors(states: np.ndarray, targets: np.ndarray, size: int) -> np.ndarray:
+    # Sorted, unique successors of a chunk of states
+    blanks = _blanks(states, size)
+    children = []
+    for direction_targets in targets:
+        cells = direction_targets[blanks]
+        valid = cells >= 0
+        parents = states[valid]
+        target_shift = cells[valid].astype(np.uint64) * np.uint64(4)
+        blank_shift = blanks[valid].astype(np.uint64) * np.uint64(4)
+        tiles = (parents >> target_shift) & np.uint64(15)
+        children.append(parents ^ (tiles << target_shift) ^ (tiles << blank_shift))
+    return np.unique(np.concatenate(children))
+
+def _write_runs(layer_path: str, run_dir: str, targets: np.ndarray, size: int, chunk: int) -> List[str]:
+    runs = []
+    with open(layer_path, 'rb') as f:
+        while True:
+            states = np.fromfile(f, dtype=np.uint64, count=chunk)
+            if not states.size:
+                break
+            runs.append(os.path.join(run_dir, f"run_{len(runs):05d}.bin"))
+            _successors(states, targets, size).tofile(runs[-1])
+    return runs
+
+def _merge_runs(runs: List[str], previous_path: Optional[str], output_path: str, memory: int) -> int:
+    # Merges the sorted runs into `output_path` without the states of the
+    # previous layer; returns the number of states written
+    block = max(1024, memory // (8 * 4 * (len(runs) + 1)))
+    readers = [_SortedReader(path, block) for path in runs]
+    previous = _SortedReader(previous_path, block) if previous_path else None
+    count = 0
+    try:
+        with open(output_path, 'wb') as output:
+            while True:
+                active = [reader for reader in readers if reader.last() is not None]
+                if not active:
+                    break
+                # Every run is complete up to the smallest of their buffered maxima
+                bound = min(reader.last() for reader in active)
+                merged = np.unique(np.concatenate([reader.take_upto(bound) for reader in active]))
+                if previous is not None:
+                    seen = previous.take_upto(bound)
+                    if seen.size:
+                        merged = merged[~np.isin(merged, seen, assume_unique=True)]
+                merged.tofile(output)
+                count += merged.size
+    finally:
+        for reader in readers + ([previous] if previous else []):
+            reader.close()
+    return count
+
+def _contains(layer: np.ndarray, state: int) -> bool:
+    position = int(np.searchsorted(layer, np.uint64(state)))
+    return position < layer.size and int(layer[position]) == state
+
+def bfs_layers(layout: BoardLayout, initial_state: int, directory: str, memory_mb: int = DEFAULT_MEMORY_MB,
+               goal_state: Optional[int] = None, max_depth: Optional[int] = None, keep_layers: bool = True,
+               progress: Optional[Callable] = None) -> List[int]:
+    # Writes layer_DDD.bin files to `directory` and returns the size of every
+    # layer. Stops after the layer containing `goal_state`, after `max_depth`,
+    # or when no new states are found. Without `keep_layers` only the two
+    # layers needed for duplicate detection are kept on disk.
+    if layout.size > 16:
+        raise ValueError("The disk BFS backend supports boards with at most 16 cells")
+    memory = memory_mb * 1024 * 1024
+    chunk = max(1024, memory // BYTES_PER_PARENT)
+    targets, _ = _move_tables(layout, "LRUD")
+
+    def layer_path(depth: int) -> str:
+        return os.path.join(directory, f"layer_{depth:03d}.bin")
+
+    np.array([initial_state], dtype=np.uint64).tofile(layer_path(0))
+    sizes = [1]
+    visited, processed = 1, 0
+    while initial_state != goal_state and (max_depth is None or len(sizes) <= max_depth):
+        depth = len(sizes) - 1
+        run_dir = tempfile.mkdtemp(prefix="runs_", dir=directory)
+        try:
+            runs = _write_runs(layer_path(depth), run_dir, targets, layout.size, chunk)
+            count = _merge_runs(runs, layer_path(depth - 1) if depth else None, layer_path(depth + 1), memory)
+        finally:
+            shutil.rmtree(run_dir)
+        processed += sizes[-1]
+        if not keep_layers and depth:
+            os.remove(layer_path(depth - 1))
+        if not count:
+            os.remove(layer_path(depth + 1))
+            break
+        sizes.append(count)
+        visited += count
+        if progress is not None:
+            progress(processed, visited, count, depth + 1)
+        if goal_state is not None and _contains(np.memmap(layer_path(depth + 1), dtype=np.uint64, mode='r'),
+                                                goal_state):
+            break
+    return sizes
+
+def _trace_back(layout: BoardLayout, directory: str, goal_depth: int) -> str:
+    # Walks from the goal to the initial state through one neighbour per layer
+    moves = []
+    state, blank = layout.goal_state, layout.goal_blank
+    for depth in range(goal_depth - 1, -1, -1):
+        layer = np.memmap(os.path.join(directory, f"layer_{depth:03d}.bin"), dtype=np.uint64, mode='r')
+        for target, _ in layout.moves(blank):
+            parent = layout.apply_move(state, blank, target)
+            if _contains(layer, parent):
+                # The move from the parent takes its blank (at `target`) to `blank`
+                moves.append(next(MOVES[code] for cell, code in layout.moves(target) if cell == blank))
+                state, blank = parent, target
+                break
+        else:
+            raise RuntimeError(f"No predecessor of a depth {depth + 1} state in layer {depth}")
+    return "".join(reversed(moves))
+
+def external_bfs(layout: BoardLayout, initial_state: int, memory_mb: int = DEFAULT_MEMORY_MB,
+                 directory: Optional[str] = None,
+                 progress: Optional[Callable] = None) -> Tuple[Optional[str], int, int, int]:
+    # Returns (move string or None, visited, processed, max depth) like
+    # layered_bfs. Layers are processed whole, so `processed` counts every state
+    # of the layers before the goal's. The layer files live in a temporary
+    # directory under `directory` (default: the system's) and are removed.
+    work_dir = tempfile.mkdtemp(prefix="bfs_", dir=directory)
+    try:
+        sizes = bfs_layers(layout, initial_state, work_dir, memory_mb, goal_state=layout.goal_state,
+                           progress=progress)
+        goal_depth = len(sizes) - 1
+        found = _contains(np.memmap(os.path.join(work_dir, f"layer_{goal_depth:03d}.bin"),
+                                    dtype=np.uint64, mode='r'), layout.goal_state)
+        moves = _trace_back(layout, work_dir, goal_depth) if found else None
+        return moves, sum(sizes), sum(sizes[:goal_depth]), goal_depth
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count the states at every distance from the goal "
+                                                 "with a disk-backed breadth-first search")
+    parser.add_argument('height', type=int)
+    parser.add_argument('width', type=int)
+    parser.add_argument('--max-depth', type=int, default=None, help="stop after this layer")
+    parser.add_argument('--memory', type=int, default=DEFAULT_MEMORY_MB, help="RAM budget in MB")
+    parser.add_argument('--dir', default=None, help="directory for the layer files (default: a temporary one)")
+    parser.add_argument('--output', default=None, help="also write depth,states as CSV to this file")
+    args = parser.parse_args()
+
+    layout = get_layout(args.height, args.width)
+    work_dir = tempfile.mkdtemp(prefix="bfs_", dir=args.dir)
+    try:
+        sizes = bfs_layers(layout, layout.goal_state, work_dir, args.memory, max_depth=args.max_depth,
+                           keep_layers=False,
+                           progress=lambda processed, visited, frontier, depth:
+                           print(f"Depth {depth}: {frontier} states", file=sys.stderr))
+    finally:
+        shutil.rmtree(work_dir)
+
+    print("depth,states")
+    for depth, count in enumerate(sizes):
+        print(f"{depth},{count}")
+    print(f"Total: {sum(sizes)} states in {len(sizes)} layers", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write("depth,states\n")
+            f.writelines(f"{depth},{count}\n" for depth, count in enumerate(sizes))
@@ -0,0 +1,83 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+from board import BoardLayout, get_layout
+from external_bfs import bfs_layers, DEFAULT_MEMORY_MB
+from helpers import write_board
+
+# Instance generator replacing dataset/puzzlegen.jar. Layer d of a breadth-
+# first search from the goal holds exactly the states whose shortest solution
+# has d moves, so instances sampled from it have an exact optimal depth, which
+# random walks cannot guarantee. The layers come from the disk-backed BFS and
+# are memory-mapped for sampling, so deep layers need not fit in RAM. Files are
+# written as size_depth_id.txt (e.g. 4x4_07_00012.txt), the names batch.py,
+# generate_solutions.ps1 and analyze.py expect.
+
+DEFAULT_DEPTHS = [1, 2, 3, 4, 5, 6, 7]
+SEED = 2024
+
+def elements_of(layout: BoardLayout, state: int) -> List[List[int]]:
+    values = layout.unpack(state)
+    return [values[row * layout.width:(row + 1) * layout.width] for row in range(layout.height)]
+
+def generate(output_dir: str, height: int, width: int, depths: List[int], count: Optional[int] = None,
+             seed: int = SEED, memory_mb: int = DEFAULT_MEMORY_MB, work_dir: Optional[str] = None) -> int:
+    # Writes `count` distinct instances per depth (all states of the layer if
+    # it is smaller, or if count is None); returns the number of files written
+    layout = get_layout(height, width)
+    os.makedirs(output_dir, exist_ok=True)
+    layer_dir = tempfile.mkdtemp(prefix="layers_", dir=work_dir)
+    written = 0
+    try:
+        sizes = bfs_layers(layout, layout.goal_state, layer_dir, memory_mb, max_depth=max(depths))
+        for depth in sorted(set(depths)):
+            if depth >= len(sizes):
+                print(f"No states at depth {depth}; the deepest layer is {len(sizes) - 1}", file=sys.stderr)
+                continue
+            layer = np.memmap(os.path.join(layer_dir, f"layer_{depth:03d}.bin"), dtype=np.uint64, mode='r')
+            if count is None or count >= layer.size:
+                chosen = np.arange(layer.size)
+            else:
+                # One stream per depth: a depth's instances do not depend on the other depths asked for
+                chosen = np.random.default_rng([seed, depth]).choice(layer.size, size=count, replace=False)
+            for number, index in enumerate(chosen, start=1):
+                filename = f"{height}x{width}_{depth:02d}_{number:05d}.txt"
+                write_board(elements_of(layout, int(layer[index])), os.path.join(output_dir, filename))
+            written += chosen.size
+            print(f"Depth {depth}: {chosen.size} of {layer.size} states", file=sys.stderr)
+    finally:
+        shutil.rmtree(layer_dir)
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write size_depth_id.txt puzzle instances whose shortest "
+                                                 "solution has exactly the given number of moves")
+    parser.add_argument('output_dir', help="directory to write the instance files to")
+    parser.add_argument('--size', default='4x4', metavar='HxW', help="board size (at most 16 cells, default: 4x4)")
+    parser.add_argument('--depths', type=int, nargs='+', default=DEFAULT_DEPTHS,
+                        help="optimal solution lengths to generate (default: 1-7)")
+    parser.add_argument('--count', type=int, default=None,
+                        help="instances per depth, sampled without repetition (default: every state)")
+    parser.add_argument('--seed', type=int, default=SEED, help="random seed for the sampling")
+    parser.add_argument('--memory', type=int, default=DEFAULT_MEMORY_MB, help="RAM budget of the BFS in MB")
+    parser.add_argument('--work-dir', default=None,
+                        help="directory for the temporary BFS layer files (default: the system's)")
+    args = parser.parse_args()
+
+    height, width = map(int, args.size.lower().split('x'))
+    if height * width > 16:
+        print("Error: boards with more than 16 cells are not supported")
+        sys.exit(1)
+    if min(args.depths) < 0:
+        print("Error: depths must not be negative")
+        sys.exit(1)
+
+    written = generate(args.output_dir, height, width, args.depths, args.count, args.seed,
+                       args.memory, args.work_dir)
+    print(f"{written} instances written to {args.output_dir}")
@@ -1,5 +1,5 @@
 import time
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 def read_board(filename: str) -> List[List[int]]:
     try:
@@ -30,59 +30,57 @@ def read_board(filename: str) -> List[List[int]]:
         print(f"Błąd: {str(e)}")
         return None
 
-def write_solution_file(solution_path: List[Tuple[int, int]], initial_empty_pos: Tuple[int, int], filename: str):
-    # Generate solution path as sequence of moves
-    moves_sequence = []
-    if solution_path:
-        prev_pos = initial_empty_pos
-        for curr_pos in solution_path:
-            # Determine direction of move
-            if curr_pos[0] < prev_pos[0]:  # Moving up
-                moves_sequence.append('U')
-            elif curr_pos[0] > prev_pos[0]:  # Moving down
-                moves_sequence.append('D')
-            elif curr_pos[1] < prev_pos[1]:  # Moving left
-                moves_sequence.append('L')
-            elif curr_pos[1] > prev_pos[1]:  # Moving right
-                moves_sequence.append('R')
-            prev_pos = curr_pos
-    
-    # Write solution file
+def write_board(elements: List[List[int]], filename: str):
+    # Same format as read_board parses: dimensions, then one row per line
+    with open(filename, 'w') as f:
+        f.write(f"{len(elements)} {len(elements[0])}\n")
+        f.writelines(" ".join(map(str, row)) + "\n" for row in elements)
+
+def write_solution_file(moves_sequence: Optional[str], filename: str):
+    # moves_sequence is the reconstructed move string, or None if no solution was found
     with open(filename, 'w') as f:
-        if moves_sequence:
+        if moves_sequence is not None:
             f.write(f"{len(moves_sequence)}\n")
-            f.write("".join(moves_sequence))
+            f.write(moves_sequence)
         else:
             f.write("-1")
     
     return moves_sequence
 
-def write_info_file(moves_sequence: List[str], visited_count: int, processed_count: int, 
-                   max_depth: int, duration_ms: float, filename: str):
+def write_info_file(moves_sequence: Optional[str], visited_count: int, processed_count: int, 
+                   max_depth: int, duration_ms: Optional[float], filename: str,
+                   bounded_stats: Optional[Tuple[Optional[float], ...]] = None):
+    # bounded_stats = (weight used, budget consumed, suboptimality bound) of the
+    # bounded-suboptimal searches, written as three extra lines (-1 = none).
+    # duration_ms is None for a result replayed from the cache, written as -1.
     with open(filename, 'w') as f:
-        f.write(f"{len(moves_sequence) if moves_sequence else -1}\n")
+        f.write(f"{len(moves_sequence) if moves_sequence is not None else -1}\n")
         f.write(f"{visited_count}\n")
         f.write(f"{processed_count}\n")
         f.write(f"{max_depth}\n")
-        f.write(f"{duration_ms:.3f}")
+        f.write(f"{duration_ms:.3f}" if duration_ms is not None else "-1")
+        if bounded_stats is not None:
+            for value in bounded_stats:
+                f.write(f"\n{value if value is not None else -1:.3f}")
 
 def time_execution(func):
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.time()
+        end_time = time.perf_counter()
         duration_ms = (end_time - start_time) * 1000  # Convert to milliseconds
         return result, duration_ms
     return wrapper
 
-def print_search_summary(solution_found: bool, solution_path: List[str] = None, 
+def print_search_summary(solution_found: bool, solution_path: Optional[str] = None, 
                          visited_count: int = 0, processed_count: int = 0, 
-                         max_depth: int = 0, duration_ms: float = 0):
+                         max_depth: int = 0, duration_ms: Optional[float] = 0,
+                         bounded_stats: Optional[Tuple[Optional[float], ...]] = None):
     print("\n" + "=" * 40)
     if solution_found:
         print(f"Puzzle solved!")
         print(f"Solution length: {len(solution_path)}")
-        print(f"Solution path: {''.join(solution_path)}")
+        print(f"Solution path: {solution_path}")
     else:
         print(f"No solution found.")
     
@@ -90,4 +88,12 @@ def print_search_summary(solution_found: bool, solution_path: List[str] = None,
     print(f"States visited: {visited_count}")
     print(f"States processed: {processed_count}")
     print(f"Maximum depth: {max_depth}")
-    print(f"Duration: {duration_ms:.3f} ms")
\ No newline at end of file
+    if duration_ms is not None:
+        print(f"Duration: {duration_ms:.3f} ms")
+    else:
+        print("Duration: not measured (cached result)")
+    if bounded_stats is not None:
+        weight, budget_used, bound = bounded_stats
+        print(f"Weight used: {weight if weight is not None else 'n/a'}")
+        print(f"Budget consumed: {f'{budget_used:.1%}' if budget_used is not None else 'no budget'}")
+        print(f"Proven suboptimality bound: {f'{bound:.3f}' if bound is not None else 'none'}")
\ No newline at end of file
@@ -0,0 +1,234 @@
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+from board import BoardLayout
+from pattern_db import load_pattern_database
+
+# Registry of heuristics selectable as search strategies. A factory takes a
+# BoardLayout and returns an object with `evaluate(state)` (full computation)
+# and `update(value, state, tile, blank, target)` (child value from the
+# parent's value after `tile` moved from `target` into `blank`).
+HEURISTICS: Dict[str, Callable[[BoardLayout], object]] = {}
+HEURISTIC_DESCRIPTIONS: Dict[str, str] = {}
+
+def register_heuristic(name: str, description: str):
+    def decorator(factory):
+        HEURISTICS[name] = factory
+        HEURISTIC_DESCRIPTIONS[name] = description
+        return factory
+    return decorator
+
+@lru_cache(maxsize=None)
+def create_heuristic(name: str, layout: BoardLayout):
+    # Heuristic objects only hold lookup tables, so one instance per layout is shared
+    if name not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{name}'; valid heuristics are {', '.join(HEURISTICS)}")
+    return HEURISTICS[name](layout)
+
+@register_heuristic('manh', "Manhattan distance")
+class ManhattanDistance:
+    # Sum of the row and column distances of every tile from its goal cell.
+    # `distance[tile][index]` is precomputed once per layout, so a move only
+    # needs the moved tile's old and new cell to update the parent's value.
+    def __init__(self, layout: BoardLayout):
+        self.layout = layout
+        self.distance = [[0] * layout.size for _ in range(layout.size)]
+
+        for tile in range(1, layout.size):
+            expected_row, expected_col = divmod(tile - 1, layout.width)
+            for index in range(layout.size):
+                row, col = divmod(index, layout.width)
+                self.distance[tile][index] = abs(row - expected_row) + abs(col - expected_col)
+
+    def evaluate(self, state: int) -> int:
+        distance = self.distance
+        return sum(distance[tile][index] for index, tile in enumerate(self.layout.unpack(state)))
+
+    def update(self, value: int, state: int, tile: int, blank: int, target: int) -> int:
+        # `tile` moves from `target` into the old blank cell `blank`, giving `state`
+        row = self.distance[tile]
+        return value + row[blank] - row[target]
+
+@register_heuristic('hamm', "Hamming distance")
+class HammingDistance:
+    # Number of cells (the empty one included) that differ from the goal.
+    # `misplaced[tile][index]` is 1 when `tile` does not belong at `index`.
+    def __init__(self, layout: BoardLayout):
+        self.layout = layout
+        goal_values = layout.unpack(layout.goal_state)
+        self.misplaced = [[int(goal_values[index] != tile) for index in range(layout.size)]
+                          for tile in range(layout.size)]
+
+    def evaluate(self, state: int) -> int:
+        misplaced = self.misplaced
+        return sum(misplaced[tile][index] for index, tile in enumerate(self.layout.unpack(state)))
+
+    def update(self, value: int, state: int, tile: int, blank: int, target: int) -> int:
+        # Both the moved tile and the empty cell change places
+        row, empty = self.misplaced[tile], self.misplaced[0]
+        return value + row[blank] - row[target] + empty[target] - empty[blank]
+
+@register_heuristic('lcon', "Manhattan distance with linear conflicts")
+class LinearConflict:
+    # Manhattan distance plus 2 moves for every tile that has to leave its goal
+    # row (column) so the others in that line can pass each other. The extra
+    # cost of a line depends only on the tiles in it, so it is looked up by the
+    # line's packed contents and every distinct line is computed only once.
+    def __init__(self, layout: BoardLayout):
+        self.layout = layout
+        self.manhattan = ManhattanDistance(layout)
+        self.row_bits = layout.bits * layout.width
+        self.row_mask = (1 << self.row_bits) - 1
+        self.row_tables = [{} for _ in range(layout.height)]
+        self.column_tables = [{} for _ in range(layout.width)]
+
+    @staticmethod
+    def _line_conflicts(goal_indexes: List[int]) -> int:
+        # Tiles that must step aside = line length - longest increasing subsequence
+        longest = []
+        for goal_index in goal_indexes:
+            i = 0
+            while i < len(longest) and longest[i] < goal_index:
+                i += 1
+            if i == len(longest):
+                longest.append(goal_index)
+            else:
+                longest[i] = goal_index
+        return 2 * (len(goal_indexes) - len(longest))
+
+    def _row_conflicts(self, state: int, row: int) -> int:
+        key = (state >> (row * self.row_bits)) & self.row_mask
+        table = self.row_tables[row]
+        if key not in table:
+            width, mask, bits = self.layout.width, self.layout.mask, self.layout.bits
+            tiles = [(key >> (col * bits)) & mask for col in range(width)]
+            table[key] = self._line_conflicts([(tile - 1) % width for tile in tiles
+                                               if tile and (tile - 1) // width == row])
+        return table[key]
+
+    def _column_conflicts(self, state: int, col: int) -> int:
+        layout = self.layout
+        tiles = tuple(layout.tile_at(state, row * layout.width + col) for row in range(layout.height))
+        table = self.column_tables[col]
+        if tiles not in table:
+            table[tiles] = self._line_conflicts([(tile - 1) // layout.width for tile in tiles
+                                                 if tile and (tile - 1) % layout.width == col])
+        return table[tiles]
+
+    def evaluate(self, state: int) -> int:
+        return (self.manhattan.evaluate(state)
+                + sum(self._row_conflicts(state, row) for row in range(self.layout.height))
+                + sum(self._column_conflicts(state, col) for col in range(self.layout.width)))
+
+    def update(self, value: int, state: int, tile: int, blank: int, target: int) -> int:
+        # A horizontal move keeps the order of tiles in their row, so only the two
+        # columns change; a vertical move likewise only changes two rows.
+        value = self.manhattan.update(value, state, tile, blank, target)
+        parent_state = self.layout.apply_move(state, target, blank)
+        width = self.layout.width
+        if blank // width == target // width:
+            for col in (blank % width, target % width):
+                value += self._column_conflicts(state, col) - self._column_conflicts(parent_state, col)
+        else:
+            for row in (blank // width, target // width):
+                value += self._row_conflicts(state, row) - self._row_conflicts(parent_state, row)
+        return value
+
+@lru_cache(maxsize=None)
+def walking_distance_table(lines: int, cells_per_line: int) -> Dict[Tuple[int, ...], int]:
+    # Breadth-first search over the walking-distance abstraction: for every line
+    # only the number of tiles belonging to each goal line is kept, plus the line
+    # holding the blank. Moving the blank to an adjacent line carries one tile
+    # the other way. Keys are the flattened counts followed by the blank's line.
+    goal = [0] * (lines * lines)
+    for line in range(lines):
+        goal[line * lines + line] = cells_per_line
+    goal[-1] -= 1
+    goal_key = tuple(goal) + (lines - 1,)
+
+    table = {goal_key: 0}
+    queue = deque([goal_key])
+    while queue:
+        key = queue.popleft()
+        counts, blank_line = list(key[:-1]), key[-1]
+        for other_line in (blank_line - 1, blank_line + 1):
+            if not 0 <= other_line < lines:
+                continue
+            for goal_line in range(lines):
+                if counts[other_line * lines + goal_line]:
+                    counts[other_line * lines + goal_line] -= 1
+                    counts[blank_line * lines + goal_line] += 1
+                    next_key = tuple(counts) + (other_line,)
+                    if next_key not in table:
+                        table[next_key] = table[key] + 1
+                        queue.append(next_key)
+                    counts[other_line * lines + goal_line] += 1
+                    counts[blank_line * lines + goal_line] -= 1
+    return table
+
+# The walking-distance tables grow steeply with the number of lines: 25k
+# entries for 4x4 and 6M (a minute to build) for 5 lines of 4 cells. Larger
+# boards are rejected instead of building them.
+WD_MAX_CELLS = 16
+WD_MAX_LINES = 6
+
+@register_heuristic('wd', "walking distance")
+class WalkingDistance:
+    # Sum of the vertical and horizontal walking distances, each read from a
+    # precomputed table (24964 entries per direction on a 4x4 board).
+    def __init__(self, layout: BoardLayout):
+        if layout.size > WD_MAX_CELLS or max(layout.height, layout.width) > WD_MAX_LINES:
+            raise ValueError(f"The walking distance heuristic supports boards with at most {WD_MAX_CELLS} cells "
+                             f"and {WD_MAX_LINES} rows or columns")
+        self.layout = layout
+        self.row_table = walking_distance_table(layout.height, layout.width)
+        self.column_table = walking_distance_table(layout.width, layout.height)
+        self.goal_row = [0] + [(tile - 1) // layout.width for tile in range(1, layout.size)]
+        self.goal_column = [0] + [(tile - 1) % layout.width for tile in range(1, layout.size)]
+
+    def _row_counts(self, state: int) -> List[int]:
+        # counts[row * height + goal row] = tiles in `row` that belong in `goal row`
+        height, width, goal_row = self.layout.height, self.layout.width, self.goal_row
+        counts = [0] * (height * height)
+        for index, tile in enumerate(self.layout.unpack(state)):
+            if tile:
+                counts[index // width * height + goal_row[tile]] += 1
+        return counts
+
+    def _column_counts(self, state: int) -> List[int]:
+        width, goal_column = self.layout.width, self.goal_column
+        counts = [0] * (width * width)
+        for index, tile in enumerate(self.layout.unpack(state)):
+            if tile:
+                counts[index % width * width + goal_column[tile]] += 1
+        return counts
+
+    def evaluate(self, state: int) -> int:
+        width = self.layout.width
+        blank = self.layout.unpack(state).index(0)
+        return (self.row_table[tuple(self._row_counts(state)) + (blank // width,)]
+                + self.column_table[tuple(self._column_counts(state)) + (blank % width,)])
+
+    def update(self, value: int, state: int, tile: int, blank: int, target: int) -> int:
+        # A horizontal move keeps every tile and the blank in their rows, so the
+        # vertical walking distance is unchanged and only the horizontal one is
+        # looked up again (and vice versa). Only that direction's counts are
+        # scanned; the parent's are the same with `tile` moved back to `target`.
+        width = self.layout.width
+        if blank // width == target // width:
+            table, goal_line, lines = self.column_table, self.goal_column[tile], width
+            counts = self._column_counts(state)
+            new_line, old_line = blank % width, target % width
+        else:
+            table, goal_line, lines = self.row_table, self.goal_row[tile], self.layout.height
+            counts = self._row_counts(state)
+            new_line, old_line = blank // width, target // width
+        new_distance = table[tuple(counts) + (old_line,)]
+        counts[new_line * lines + goal_line] -= 1
+        counts[old_line * lines + goal_line] += 1
+        return value + new_distance - table[tuple(counts) + (new_line,)]
+
+@register_heuristic('pdb', "additive pattern database")
+def pattern_database(layout: BoardLayout):
+    return load_pattern_database(layout.height, layout.width)
@@ -1,30 +1,66 @@
+import argparse
+import os
 import sys
+from typing import Optional
 from helpers import (
     read_board, write_solution_file, write_info_file, 
     time_execution, print_search_summary
 )
 from board import Board
-from search_methods import SearchMethod
+from progress import ConsoleSink, JsonLinesSink, profile_run
+from result_log import ResultLog, result_record
+from search_methods import SearchMethod, DEFAULT_TRANSPOSITION_SIZE
+from solution_cache import CachedResult, SolutionCache, method_key, DEFAULT_MAX_ENTRIES
+from heuristics import HEURISTICS, HEURISTIC_DESCRIPTIONS
+
+SEARCH_METHODS = ['bfs', 'bbfs', 'dfs', 'iddfs', 'astr', 'idas', 'wastr', 'arastr', 'beam']
+HEURISTIC_METHODS = ['astr', 'idas', 'wastr', 'arastr', 'beam']  # Strategy is a heuristic rather than a move order
+# Bounded-suboptimal methods: they stop at a node/time budget and report the
+# weight used, budget consumed and proven bound in the info file. Their results
+# depend on the budget, so they are never cached.
+BOUNDED_METHODS = ['wastr', 'arastr', 'beam']
+
+def is_cacheable(method: str, search_options: dict) -> bool:
+    # Parallel A* (workers > 1) returns an optimal path, but which one and the
+    # visited/processed counts depend on the scheduling, so it is not cached either
+    return method.lower() not in BOUNDED_METHODS and search_options.get('workers', 1) <= 1
 
 @time_execution
-def run_search(board: Board, search_method_name: str, search_strategy: str):
-    search_method = SearchMethod(search_strategy)
+def run_search(search_method: SearchMethod, board: Board, search_method_name: str):
+    # Unsolvable permutations are rejected before any search; the counters stay at 0
+    if not board.is_solvable():
+        return None, ""
     
     # Choose search method based on input
     if search_method_name.lower() == 'bfs':
         solution, solution_path = search_method.bfs(board)
+    elif search_method_name.lower() == 'bbfs':
+        solution, solution_path = search_method.bidirectional_bfs(board)
     elif search_method_name.lower() == 'dfs':
         # DFS has a minimum depth limit of 20
         solution, solution_path = search_method.dfs(board, depth_limit=20)
+    elif search_method_name.lower() == 'iddfs':
+        solution, solution_path = search_method.iddfs(board)
     elif search_method_name.lower() == 'astr':
         solution, solution_path = search_method.a_star(board)
+    elif search_method_name.lower() == 'idas':
+        solution, solution_path = search_method.ida_star(board)
+    elif search_method_name.lower() == 'wastr':
+        solution, solution_path = search_method.weighted_a_star(board)
+    elif search_method_name.lower() == 'arastr':
+        solution, solution_path = search_method.anytime_a_star(board)
+    elif search_method_name.lower() == 'beam':
+        solution, solution_path = search_method.beam_search(board)
     else:
         raise ValueError(f"Unknown search method: {search_method_name}")
     
-    return solution, solution_path, search_method
+    return solution, solution_path
 
 def solve_puzzle(board: Board, search_method_name: str, search_strategy: str, 
-                solution_file: str, info_file: str):
+                solution_file: str, info_file: str, cache: Optional[SolutionCache] = None, **search_options):
+    # search_options are passed on to SearchMethod (e.g. bfs_backend, observer);
+    # with a cache, a stored result for the same board, method and strategy is reused.
+    # Returns the result and its status, 'ok' or 'cached'.
     print(f"Initial board state:")
     print(board)
     print(f"Empty position: {board.empty_position}")
@@ -32,67 +68,126 @@ def solve_puzzle(board: Board, search_method_name: str, search_strategy: str,
     
     if search_method_name.lower() == 'dfs':
         print("Note: DFS has a minimum depth limit of 20")
-    elif search_method_name.lower() == 'astr':
-        if search_strategy.lower() == 'manh':
-            print("Using Manhattan distance heuristic")
-        elif search_strategy.lower() == 'hamm':
-            print("Using Hamming distance heuristic")
+    elif search_method_name.lower() in HEURISTIC_METHODS:
+        print(f"Using {HEURISTIC_DESCRIPTIONS[search_strategy.lower()]} heuristic")
     
     print("=" * 40)
     
-    # Run search and measure time
-    (solution, solution_path, search_method), duration_ms = run_search(board, search_method_name, search_strategy)
+    if not is_cacheable(search_method_name, search_options):
+        cache = None
+    cache_method = method_key(search_method_name, search_options)
+    result = cache.get(board, cache_method, search_strategy) if cache is not None else None
+    status = 'cached' if result is not None else 'ok'
+    if result is not None:
+        print(f"Using the cached result from {cache.path}")
+    else:
+        if not board.is_solvable():
+            print("The board is unsolvable (permutation parity), skipping the search")
+        
+        # Run search and measure time
+        search_method = SearchMethod(search_strategy, **search_options)
+        (solution, solution_path), duration_ms = run_search(search_method, board, search_method_name)
+        bounded_stats = None
+        if search_method_name.lower() in BOUNDED_METHODS:
+            bounded_stats = (search_method.weight_used, search_method.budget_used,
+                             search_method.suboptimality_bound)
+        result = CachedResult(solution_path if solution is not None else None, search_method.visited_count,
+                              search_method.processed_count, search_method.max_depth, duration_ms,
+                              bounded_stats)
+        if cache is not None:
+            cache.put(board, cache_method, search_strategy, result)
     
-    # Generate solution file
-    moves_sequence = write_solution_file(solution_path, board.empty_position, solution_file)
+    # Generate solution file from the reconstructed move string
+    moves_sequence = write_solution_file(result.moves, solution_file)
     
     # Generate additional information file
     write_info_file(
         moves_sequence, 
-        search_method.visited_count, 
-        search_method.processed_count, 
-        search_method.max_depth, 
-        duration_ms, 
-        info_file
+        result.visited, 
+        result.processed, 
+        result.max_depth, 
+        result.duration_ms, 
+        info_file,
+        result.bounded_stats
     )
     
     # Print summary
     print_search_summary(
-        solution is not None,
+        moves_sequence is not None,
         moves_sequence,
-        search_method.visited_count,
-        search_method.processed_count,
-        search_method.max_depth,
-        duration_ms
+        result.visited,
+        result.processed,
+        result.max_depth,
+        result.duration_ms,
+        result.bounded_stats
     )
+    return result, status
 
 if __name__ == "__main__":
     # Check command line arguments
-    if len(sys.argv) != 6:
-        print("Usage: python main.py <search_method> <search_strategy> <input_file> <solution_file> <info_file>")
-        print("  search_method: 'bfs', 'dfs', or 'astr'")
-        print("  search_strategy: e.g., 'LRUD' for Left-Right-Up-Down, or 'manh'/'hamm' for A*")
-        print("  input_file: path to file containing initial board state")
-        print("  solution_file: path to file where solution will be saved")
-        print("  info_file: path to file where additional information will be saved")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        usage="python main.py <search_method> <search_strategy> <input_file> <solution_file> <info_file> [options]")
+    parser.add_argument("search_method", help=f"one of {', '.join(SEARCH_METHODS)}")
+    parser.add_argument("search_strategy",
+                        help=f"e.g., 'LRUD' for Left-Right-Up-Down, or {'/'.join(HEURISTICS)} for heuristic methods")
+    parser.add_argument("input_file", help="path to file containing initial board state")
+    parser.add_argument("solution_file", help="path to file where solution will be saved")
+    parser.add_argument("info_file", help="path to file where additional information will be saved")
+    parser.add_argument("--bfs-backend", choices=["deque", "numpy", "disk"], default="deque",
+                        help="BFS engine: node-by-node 'deque', layer-synchronous 'numpy' or external-memory "
+                             "'disk' (both boards up to 16 cells)")
+    parser.add_argument("--bfs-memory", type=int, default=256, help="RAM budget of the disk BFS backend in MB")
+    parser.add_argument("--bfs-dir", metavar="DIR", default=None,
+                        help="directory for the disk BFS layer files (default: the system's temporary directory)")
+    parser.add_argument("--open-list", choices=["heap", "buckets"], default="heap",
+                        help="A* open list: binary 'heap' or f/g-indexed 'buckets' (deepest node first on ties)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="A* worker processes; more than 1 runs hash-distributed parallel A* (HDA*)")
+    parser.add_argument("--weight", type=float, default=2.0,
+                        help="heuristic weight of wastr, initial weight of arastr (default: 2.0)")
+    parser.add_argument("--beam-width", type=int, default=1000, help="nodes kept per layer by beam search")
+    parser.add_argument("--node-budget", type=int, default=None,
+                        help="processed nodes after which wastr/arastr/beam stop with their best solution")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="seconds after which wastr/arastr/beam stop with their best solution")
+    parser.add_argument("--table-size", type=int, default=DEFAULT_TRANSPOSITION_SIZE,
+                        help="slots in the IDDFS transposition table (fixed memory, 10 bytes each up to 4x4)")
+    parser.add_argument("--verify-heuristic", action="store_true",
+                        help="astr/idas: check every incremental heuristic update against a full evaluation")
+    parser.add_argument("--verbose", action="store_true", help="print search progress to stderr")
+    parser.add_argument("--progress-log", metavar="FILE", default=None,
+                        help="append search progress samples to FILE as JSON lines")
+    parser.add_argument("--progress-interval", type=float, default=1.0,
+                        help="seconds between two progress samples (default: 1)")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"], default=None,
+                        help="profile the run and print a summary to stderr")
+    parser.add_argument("--profile-output", metavar="FILE", default=None,
+                        help="also dump the cProfile stats or tracemalloc snapshot to FILE")
+    parser.add_argument("--cache", metavar="FILE", default=None,
+                        help="reuse finished searches from this SQLite file and store new ones (off by default)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="maximum number of cached results; least recently used ones are evicted")
+    parser.add_argument("--result-log", metavar="FILE", default=None,
+                        help="also append the result to this JSON-lines file, which analyze.py can read")
+    args = parser.parse_args()
     
-    search_method = sys.argv[1]
-    search_strategy = sys.argv[2]
-    input_file = sys.argv[3]
-    solution_file = sys.argv[4]
-    info_file = sys.argv[5]
+    search_method = args.search_method
+    search_strategy = args.search_strategy
+    input_file = args.input_file
+    solution_file = args.solution_file
+    info_file = args.info_file
     
     # Check if search method is valid
-    if search_method.lower() not in ['bfs', 'dfs', 'astr']:
+    if search_method.lower() not in SEARCH_METHODS:
         print(f"Invalid search method: {search_method}")
-        print("Valid methods are 'bfs', 'dfs', and 'astr'")
+        print(f"Valid methods are {', '.join(repr(method) for method in SEARCH_METHODS)}")
         sys.exit(1)
     
-    # Check if search strategy is valid for A*
-    if search_method.lower() == 'astr' and search_strategy.lower() not in ['manh', 'hamm']:
-        print(f"Invalid search strategy for A*: {search_strategy}")
-        print("Valid strategies for A* are 'manh' (Manhattan) and 'hamm' (Hamming)")
+    # Check if search strategy is valid for heuristic methods
+    if search_method.lower() in HEURISTIC_METHODS and search_strategy.lower() not in HEURISTICS:
+        print(f"Invalid search strategy for {search_method}: {search_strategy}")
+        print("Valid strategies for heuristic methods are " +
+              ", ".join(f"'{name}' ({description})" for name, description in HEURISTIC_DESCRIPTIONS.items()))
         sys.exit(1)
     
     # Read board from input file
@@ -103,5 +198,39 @@ if __name__ == "__main__":
         print(f"Error reading input file: {e}")
         sys.exit(1)
     
+    # The search is silent unless a progress sink is requested
+    progress_log = open(args.progress_log, "a") if args.progress_log else None
+    sinks = ([ConsoleSink()] if args.verbose else []) + ([JsonLinesSink(progress_log)] if progress_log else [])
+    observer = None
+    if sinks:
+        observer = lambda sample: [sink(sample) for sink in sinks]
+    
+    # Profiling, progress reporting and heuristic checks are about the search itself,
+    # so they bypass the cache
+    use_cache = args.cache and not (args.profile or sinks or args.verify_heuristic)
+    cache = SolutionCache(args.cache, args.cache_size) if use_cache else None
+    
     # Solve puzzle and generate output files
-    solve_puzzle(board, search_method, search_strategy, solution_file, info_file)
+    try:
+        with profile_run(args.profile, args.profile_output):
+            result, status = solve_puzzle(
+                board, search_method, search_strategy, solution_file, info_file, cache=cache,
+                bfs_backend=args.bfs_backend, bfs_memory_mb=args.bfs_memory, bfs_directory=args.bfs_dir,
+                open_list=args.open_list, verify_heuristic=args.verify_heuristic,
+                transposition_size=args.table_size, workers=args.workers, weight=args.weight,
+                beam_width=args.beam_width, node_budget=args.node_budget,
+                time_budget=args.time_budget, observer=observer,
+                progress_interval=args.progress_interval)
+        if args.result_log:
+            instance = os.path.splitext(os.path.basename(input_file))[0]
+            with ResultLog(args.result_log) as log:
+                log.write(result_record(instance, search_method, search_strategy, result, status))
+    except (FileNotFoundError, ValueError) as e:
+        # Missing pattern database tables or a board the chosen backend cannot handle
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        if progress_log:
+            progress_log.close()
+        if cache is not None:
+            cache.close()
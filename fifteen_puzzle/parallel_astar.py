@@ -0,0 +1,215 @@
+import multiprocessing
+import queue
+import time
+from typing import Callable, Optional, Tuple
+
+from board import BoardLayout, MOVES, NO_MOVE, get_layout
+from heuristics import create_heuristic
+from search_methods import OPEN_LISTS
+
+# Hash-distributed A* (HDA*). Every state has one owner process, chosen by a
+# hash of the packed state, which keeps the only open and closed entry for it.
+# Workers expand their own best nodes and send successors owned by others to
+# the owners' inboxes in batches. The closed lists also hold each state's
+# parent, so the solution path is traced back through the owners at the end.
+#
+# Optimality: once a goal of cost C is known, every worker prunes nodes with
+# f >= C and keeps expanding the rest. The search ends when all workers are idle
+# (open list empty or its best f >= C) and no batch is in flight. The latter is
+# checked with message counters collected in probe waves: the search only stops
+# after two consecutive waves in which every worker was idle and the totals of
+# sent and received nodes were equal and unchanged.
+
+EXPANSION_BATCH = 256   # Nodes a worker expands between two looks at its inbox
+OWNER_PRIME = 1_000_003  # `state % prime` depends on every cell of the packed state
+PROBE_INTERVAL = 0.01   # Seconds between two termination probe waves
+REPLY_TIMEOUT = 1.0     # Seconds the coordinator waits for a reply before checking the workers
+
+def owner_of(state: int, workers: int) -> int:
+    return state % OWNER_PRIME % workers
+
+def _worker(index: int, workers: int, height: int, width: int, heuristic_name: str, open_list: str,
+            inboxes: list, replies: multiprocessing.Queue):
+    layout = get_layout(height, width)
+    heuristic = create_heuristic(heuristic_name, layout)
+    move_table = layout.move_table("LRUD")
+    goal_state = layout.goal_state
+    inbox = inboxes[index]
+
+    open_nodes = OPEN_LISTS[open_list]()  # Items are (state, blank, h)
+    closed = {}   # state -> best g
+    parents = {}  # state -> (parent state, move code); the root's parent is None
+    outgoing = [[] for _ in range(workers)]
+    incumbent = None  # Cost of the best solution known to this worker
+    sent = received = processed = visited = max_depth = 0
+
+    def insert(state, blank, g, h, parent, move):
+        nonlocal visited
+        if state not in closed or g < closed[state]:
+            closed[state] = g
+            parents[state] = (parent, move)
+            visited += 1
+            open_nodes.push(g + h, g, (state, blank, h))
+
+    def has_work() -> bool:
+        return len(open_nodes) > 0 and (incumbent is None or open_nodes.peek_f() < incumbent)
+
+    while True:
+        # Read the inbox; wait on it only when there is nothing to expand
+        block = not has_work()
+        while True:
+            try:
+                message = inbox.get(timeout=0.05) if block else inbox.get_nowait()
+            except queue.Empty:
+                break
+            block = False
+            kind = message[0]
+            if kind == 'nodes':
+                received += len(message[1])
+                for node in message[1]:
+                    insert(*node)
+            elif kind == 'bound':
+                if incumbent is None or message[1] < incumbent:
+                    incumbent = message[1]
+            elif kind == 'probe':
+                replies.put(('probe', message[1], not has_work(), sent, received,
+                             processed, visited, max_depth, len(open_nodes)))
+            elif kind == 'trace':
+                replies.put(('trace', parents[message[1]]))
+            elif kind == 'stop':
+                # Batches still queued for other workers are dropped, not waited for
+                for other in inboxes:
+                    other.cancel_join_thread()
+                return
+
+        expanded = 0
+        while expanded < EXPANSION_BATCH and has_work():
+            f, g, (state, blank, h) = open_nodes.pop()
+            if g > closed[state]:
+                continue  # Superseded by a shorter path to the same state
+            expanded += 1
+            processed += 1
+            max_depth = max(max_depth, g)
+
+            if state == goal_state:
+                if incumbent is None or g < incumbent:
+                    incumbent = g
+                    replies.put(('solution', g, state))
+                continue
+
+            # Going back to the parent never improves its g, so that move is skipped
+            for target, move in move_table[blank][parents[state][1]]:
+                tile = layout.tile_at(state, target)
+                new_state = layout.apply_move(state, blank, target)
+                new_h = heuristic.update(h, new_state, tile, blank, target)
+                new_g = g + 1
+                if incumbent is not None and new_g + new_h >= incumbent:
+                    continue
+                owner = owner_of(new_state, workers)
+                if owner == index:
+                    insert(new_state, target, new_g, new_h, state, move)
+                else:
+                    outgoing[owner].append((new_state, target, new_g, new_h, state, move))
+
+        # Send the successors of this batch before reporting to any probe
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(('nodes', batch))
+                sent += len(batch)
+                outgoing[owner] = []
+
+def _reply(replies: multiprocessing.Queue, processes: list):
+    # Waits for the next worker reply; a worker that died (killed, out of
+    # memory, ...) never answers, so the workers are checked between polls
+    while True:
+        try:
+            return replies.get(timeout=REPLY_TIMEOUT)
+        except queue.Empty:
+            pass
+        for index, process in enumerate(processes):
+            if not process.is_alive():
+                raise RuntimeError(f"Parallel A* worker {index} exited unexpectedly "
+                                   f"(exit code {process.exitcode})")
+
+def parallel_a_star(layout: BoardLayout, initial_state: int, initial_blank: int, heuristic_name: str,
+                    workers: int, open_list: str = "heap",
+                    progress: Optional[Callable] = None) -> Tuple[Optional[str], int, int, int]:
+    # Returns (move string or None, visited, processed, max depth), the counters
+    # summed over all workers. `progress` is called after every probe wave as
+    # progress(processed, visited, frontier, depth, bound).
+    heuristic = create_heuristic(heuristic_name, layout)
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    replies = context.Queue()
+    processes = [context.Process(target=_worker, daemon=True,
+                                 args=(index, workers, layout.height, layout.width, heuristic_name,
+                                       open_list, inboxes, replies))
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        # The root is sent like any other node, so it counts as one message
+        root = (initial_state, initial_blank, 0, heuristic.evaluate(initial_state), None, NO_MOVE)
+        inboxes[owner_of(initial_state, workers)].put(('nodes', [root]))
+        best = None  # (cost, goal state)
+        previous_totals = None
+        wave = 0
+
+        while True:
+            wave += 1
+            for inbox in inboxes:
+                inbox.put(('probe', wave))
+            reports = []
+            while len(reports) < workers:
+                message = _reply(replies, processes)
+                if message[0] == 'solution':
+                    if best is None or message[1] < best[0]:
+                        best = (message[1], message[2])
+                        for inbox in inboxes:
+                            inbox.put(('bound', best[0]))
+                        previous_totals = None
+                elif message[0] == 'probe' and message[1] == wave:
+                    reports.append(message[2:])
+
+            idle = all(report[0] for report in reports)
+            sent = 1 + sum(report[1] for report in reports)
+            received = sum(report[2] for report in reports)
+            processed = sum(report[3] for report in reports)
+            visited = sum(report[4] for report in reports)
+            max_depth = max(report[5] for report in reports)
+            if progress is not None:
+                progress(processed, visited, sum(report[6] for report in reports), max_depth,
+                         best[0] if best is not None else None)
+
+            totals = (sent, received) if idle and sent == received else None
+            if totals is not None and totals == previous_totals:
+                break
+            previous_totals = totals
+            if totals is None:
+                time.sleep(PROBE_INTERVAL)
+
+        if best is None:
+            return None, visited, processed, max_depth
+
+        # Follow the parents back from the goal, asking each state's owner
+        moves = []
+        state = best[1]
+        while True:
+            inboxes[owner_of(state, workers)].put(('trace', state))
+            message = _reply(replies, processes)
+            parent, move = message[1]
+            if parent is None:
+                break
+            moves.append(MOVES[move])
+            state = parent
+        return "".join(reversed(moves)), visited, processed, max_depth
+    finally:
+        # A dead worker never drains its inbox, so nothing waits for the queues to flush
+        for inbox in inboxes:
+            inbox.put(('stop',))
+            inbox.cancel_join_thread()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,274 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from board import BoardLayout, get_layout
+
+# Additive disjoint pattern databases. Every group of tiles gets its own table
+# holding, for each placement of the group's tiles, the minimum number of moves
+# of *those* tiles needed to reach the goal placement. Moves of the other tiles
+# are free, so the tables can be summed and the result stays admissible.
+#
+# Tables are built once with `python pattern_db.py build` and stored as one
+# byte per placement behind a small header. They are opened with mmap, so a
+# solver process starts without reading them and processes share the pages.
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb_tables')
+MAGIC = b'PDB1'
+UNREACHED = 255
+
+# Well-known partitions; other sizes fall back to row-major chunks
+STANDARD_PARTITIONS = {
+    (4, 4, '6-6-3'): [[1, 5, 6, 9, 10, 13], [7, 8, 11, 12, 14, 15], [2, 3, 4]],
+    (4, 4, '7-8'): [[1, 2, 3, 4, 5, 6, 7], [8, 9, 10, 11, 12, 13, 14, 15]],
+    (4, 4, '5-5-5'): [[1, 2, 5, 6, 9], [3, 4, 7, 8, 11], [10, 12, 13, 14, 15]],
+}
+
+def default_partition_name(layout: BoardLayout) -> str:
+    if (layout.height, layout.width) == (4, 4):
+        return '6-6-3'
+    # Keep every table small enough to build in pure Python
+    group_size = 4 if layout.size <= 9 else 5
+    sizes = []
+    remaining = layout.size - 1
+    while remaining > 0:
+        sizes.append(min(group_size, remaining))
+        remaining -= sizes[-1]
+    return '-'.join(map(str, sizes))
+
+def parse_partition(layout: BoardLayout, partition: Optional[str] = None) -> List[List[int]]:
+    partition = partition or default_partition_name(layout)
+    key = (layout.height, layout.width, partition)
+    if key in STANDARD_PARTITIONS:
+        return STANDARD_PARTITIONS[key]
+
+    # Explicit groups ("1,2,5/3,4,6/...") or group sizes taken in row-major order ("4-4")
+    if '/' in partition or ',' in partition:
+        groups = [[int(tile) for tile in group.split(',')] for group in partition.split('/')]
+    else:
+        groups, tile = [], 1
+        for size in map(int, partition.split('-')):
+            groups.append(list(range(tile, tile + size)))
+            tile += size
+
+    tiles = sorted(tile for group in groups for tile in group)
+    if tiles != list(range(1, layout.size)):
+        raise ValueError(f"Partition '{partition}' must cover tiles 1..{layout.size - 1} exactly once")
+    return groups
+
+def table_size(cells: int, group_size: int) -> int:
+    size = 1
+    for i in range(group_size):
+        size *= cells - i
+    return size
+
+def rank(positions: Sequence[int], cells: int) -> int:
+    # Lexicographic rank of a k-permutation of `cells` positions (mixed radix)
+    value = 0
+    used = 0
+    for i, position in enumerate(positions):
+        # Digit = position among the cells not taken by earlier tiles
+        value = value * (cells - i) + position - (used & ((1 << position) - 1)).bit_count()
+        used |= 1 << position
+    return value
+
+def unrank(value: int, group_size: int, cells: int) -> List[int]:
+    digits = []
+    for i in range(group_size - 1, -1, -1):
+        value, digit = divmod(value, cells - i)
+        digits.append(digit)
+    digits.reverse()
+
+    positions = []
+    for digit in digits:
+        # Pick the digit-th free cell
+        position = digit
+        for earlier in sorted(positions):
+            if earlier <= position:
+                position += 1
+        positions.append(position)
+    return positions
+
+def table_filename(layout: BoardLayout, group: Sequence[int]) -> str:
+    return f"{layout.height}x{layout.width}_{'-'.join(map(str, group))}.pdb"
+
+def build_table(layout: BoardLayout, group: Sequence[int]) -> bytearray:
+    # Retrograde breadth-first search from the goal placement. A search state is
+    # a placement of the group's tiles plus the blank; every cell the blank can
+    # reach through non-group cells is the same abstract state, so the whole
+    # region is expanded at once and only moves of group tiles cost 1.
+    cells = layout.size
+    group_size = len(group)
+    neighbors = [layout.neighbors(index) for index in range(cells)]
+    table = bytearray([UNREACHED]) * table_size(cells, group_size)
+    seen = bytearray((len(table) * cells + 7) // 8)
+
+    goal_positions = [tile - 1 for tile in group]
+    layer = array('Q', [rank(goal_positions, cells) * cells + layout.goal_blank])
+    cost = 0
+
+    while layer:
+        next_layer = array('Q')
+        for entry in layer:
+            if seen[entry >> 3] & (1 << (entry & 7)):
+                continue
+            placement, start = divmod(entry, cells)
+            positions = unrank(placement, group_size, cells)
+            occupied = {position: i for i, position in enumerate(positions)}
+            if table[placement] == UNREACHED:
+                table[placement] = cost
+
+            # Flood fill the blank's region and mark it expanded
+            region = [start]
+            base = placement * cells
+            seen[(base + start) >> 3] |= 1 << ((base + start) & 7)
+            for cell in region:
+                for neighbor in neighbors[cell]:
+                    bit = base + neighbor
+                    if neighbor not in occupied and not seen[bit >> 3] & (1 << (bit & 7)):
+                        seen[bit >> 3] |= 1 << (bit & 7)
+                        region.append(neighbor)
+
+            # Slide a group tile next to the region into it
+            for cell in region:
+                for neighbor in neighbors[cell]:
+                    if neighbor in occupied:
+                        i = occupied[neighbor]
+                        positions[i] = cell
+                        next_entry = rank(positions, cells) * cells + neighbor
+                        positions[i] = neighbor
+                        if not seen[next_entry >> 3] & (1 << (next_entry & 7)):
+                            next_layer.append(next_entry)
+
+        layer = next_layer
+        cost += 1
+
+    return table
+
+def save_table(path: str, layout: BoardLayout, group: Sequence[int], table: bytearray):
+    header = MAGIC + struct.pack('<BBB', layout.height, layout.width, len(group)) + bytes(group)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(table)
+
+class PatternTable:
+    # Read-only, memory-mapped view of one group's table
+    def __init__(self, path: str, layout: BoardLayout, group: Sequence[int]):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        height, width, group_size = struct.unpack_from('<BBB', self.data, len(MAGIC))
+        self.offset = len(MAGIC) + 3 + group_size
+        if (self.data[:len(MAGIC)] != MAGIC or (height, width) != (layout.height, layout.width)
+                or list(self.data[len(MAGIC) + 3:self.offset]) != list(group)
+                or len(self.data) - self.offset != table_size(layout.size, group_size)):
+            raise ValueError(f"Pattern database '{path}' does not match a {layout.height}x{layout.width} "
+                             f"board and group {list(group)}")
+
+    def __getitem__(self, placement: int) -> int:
+        return self.data[self.offset + placement]
+
+class PatternDatabase:
+    # Heuristic interface (evaluate/update) over a set of additive tables
+    def __init__(self, layout: BoardLayout, partition: Optional[str] = None,
+                 directory: str = DEFAULT_DIRECTORY):
+        self.layout = layout
+        self.groups = parse_partition(layout, partition)
+        self.tables = []
+        for group in self.groups:
+            path = os.path.join(directory, table_filename(layout, group))
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Pattern database '{path}' not found; build it with "
+                                        f"'python pattern_db.py build --size {layout.height}x{layout.width}'")
+            self.tables.append(PatternTable(path, layout, group))
+
+        # tile -> (group number, index of the tile inside its group)
+        self.tile_group = [None] * layout.size
+        for number, group in enumerate(self.groups):
+            for i, tile in enumerate(group):
+                self.tile_group[tile] = (number, i)
+
+        # A 1 in the lowest (highest) bit of every cell's field, and for every
+        # group the group's tiles repeated in every field (see update)
+        self.ones = sum(1 << (index * layout.bits) for index in range(layout.size))
+        self.high_bits = self.ones << (layout.bits - 1)
+        self.group_fields = [[tile * self.ones for tile in group] for group in self.groups]
+
+    def _group_positions(self, state: int) -> List[List[int]]:
+        positions = [[0] * len(group) for group in self.groups]
+        tile_group = self.tile_group
+        for index, tile in enumerate(self.layout.unpack(state)):
+            if tile:
+                number, i = tile_group[tile]
+                positions[number][i] = index
+        return positions
+
+    def evaluate(self, state: int) -> int:
+        cells = self.layout.size
+        return sum(table[rank(positions, cells)]
+                   for table, positions in zip(self.tables, self._group_positions(state)))
+
+    def update(self, value: int, state: int, tile: int, blank: int, target: int) -> int:
+        # Only the moved tile's group changes: swap its old entry for the new one.
+        # The cell of each of the group's tiles is found without scanning the
+        # board: it is the only zero field of state ^ (the tile in every field).
+        # Subtracting 1 from every field sets the high bit of a zero one; the
+        # borrow can only flag fields above it, so the lowest flagged bit is exact.
+        number, i = self.tile_group[tile]
+        ones, high_bits, bits = self.ones, self.high_bits, self.layout.bits
+        positions = []
+        for tile_fields in self.group_fields[number]:
+            fields = state ^ tile_fields
+            flags = (fields - ones) & ~fields & high_bits
+            positions.append(((flags & -flags).bit_length() - 1) // bits)
+
+        cells = self.layout.size
+        table = self.tables[number]
+        new_entry = table[rank(positions, cells)]
+        positions[i] = target
+        return value - table[rank(positions, cells)] + new_entry
+
+@lru_cache(maxsize=None)
+def load_pattern_database(height: int, width: int, partition: Optional[str] = None,
+                          directory: str = DEFAULT_DIRECTORY) -> PatternDatabase:
+    return PatternDatabase(get_layout(height, width), partition, directory)
+
+def build(size: str, partition: Optional[str], directory: str, force: bool = False):
+    height, width = map(int, size.lower().split('x'))
+    layout = get_layout(height, width)
+    os.makedirs(directory, exist_ok=True)
+
+    for group in parse_partition(layout, partition):
+        path = os.path.join(directory, table_filename(layout, group))
+        if os.path.exists(path) and not force:
+            print(f"{path}: already exists, skipping")
+            continue
+
+        start_time = time.perf_counter()
+        table = build_table(layout, group)
+        save_table(path, layout, group, table)
+        print(f"{path}: {len(table)} entries, max {max(table)} moves, "
+              f"{time.perf_counter() - start_time:.1f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build additive pattern databases for the 'pdb' heuristic")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="generate the tables with a retrograde BFS")
+    build_parser.add_argument('--size', default='4x4', help="board size as HEIGHTxWIDTH (default: 4x4)")
+    build_parser.add_argument('--partition', default=None,
+                              help="group sizes such as '6-6-3' or explicit groups such as '1,2,3/4,5,6/...'")
+    build_parser.add_argument('--output', default=DEFAULT_DIRECTORY, help="directory for the table files")
+    build_parser.add_argument('--force', action='store_true', help="rebuild tables that already exist")
+    args = parser.parse_args()
+
+    try:
+        build(args.size, args.partition, args.output, args.force)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
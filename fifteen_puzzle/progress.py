@@ -0,0 +1,142 @@
+import contextlib
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional, TextIO
+
+# Progress reporting for the search methods. An observer is any callable taking
+# one sample dict; SearchMethod calls it at most once per `interval` seconds with
+# the search counters:
+#
+#   method, elapsed_s, processed, visited, frontier, depth, bound, nodes_per_sec
+#
+# `frontier` is the open list/queue/stack size (the current branch for IDA*) and
+# `bound` the f-score being expanded (A*) or the cost bound (IDA*), else None.
+
+Observer = Callable[[Dict], None]
+
+# The clock is only read every CHECK_INTERVAL processed nodes, so an attached
+# observer costs one bit test per node in the search loops
+CHECK_INTERVAL = 1024
+
+# --profile tracemalloc polls the traced memory this often (seconds) and takes a
+# new snapshot whenever it has grown by SNAPSHOT_GROWTH since the last one
+PEAK_POLL_INTERVAL = 0.05
+SNAPSHOT_GROWTH = 1.1
+
+class ProgressReporter:
+    # Rate-limits samples to one per `interval` seconds and computes nodes/sec
+    def __init__(self, observer: Observer, method: str, interval: float = 1.0):
+        self.observer = observer
+        self.method = method
+        self.interval = interval
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+
+    def sample(self, processed: int, visited: int, frontier: int, depth: int,
+               bound: Optional[int] = None, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self.last_time < self.interval:
+            return
+        self.last_time = now
+        elapsed = now - self.start_time
+        self.observer({
+            'method': self.method,
+            'elapsed_s': round(elapsed, 3),
+            'processed': processed,
+            'visited': visited,
+            'frontier': frontier,
+            'depth': depth,
+            'bound': bound,
+            'nodes_per_sec': round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+        })
+
+class JsonLinesSink:
+    # Observer writing every sample as one JSON line to a file or stream
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def __call__(self, sample: Dict):
+        self.stream.write(json.dumps(sample) + "\n")
+        self.stream.flush()
+
+class ConsoleSink:
+    # Observer printing a short human-readable progress line
+    def __init__(self, stream: TextIO = sys.stderr):
+        self.stream = stream
+
+    def __call__(self, sample: Dict):
+        bound = f", bound: {sample['bound']}" if sample['bound'] is not None else ""
+        print(f"[{sample['elapsed_s']:.1f} s] Processed {sample['processed']} states "
+              f"({sample['nodes_per_sec']:,.0f}/s), frontier: {sample['frontier']}, "
+              f"depth: {sample['depth']}{bound}", file=self.stream)
+
+class _PeakSnapshots(threading.Thread):
+    # Keeps a tracemalloc snapshot taken close to the peak of traced memory. A
+    # snapshot after the run only holds the allocations that survive it, not
+    # e.g. the open list and visited set of a search that has returned.
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.snapshot = None
+        self.snapshot_size = 0
+
+    def run(self):
+        while not self.stopped.wait(PEAK_POLL_INTERVAL):
+            self.sample()
+
+    def sample(self):
+        current, _ = tracemalloc.get_traced_memory()
+        if self.snapshot is None or current > self.snapshot_size * SNAPSHOT_GROWTH:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.sample()
+
+@contextlib.contextmanager
+def profile_run(mode: Optional[str], output: Optional[str] = None, top: int = 25):
+    # Profiles the enclosed block with 'cprofile' (call statistics) or
+    # 'tracemalloc' (allocation sites near the peak of traced memory); None does
+    # nothing. With `output` the raw cProfile stats or the tracemalloc snapshot
+    # are dumped there for later inspection; a summary is printed to stderr
+    # either way.
+    if mode is None:
+        yield
+        return
+
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(top)
+    elif mode == 'tracemalloc':
+        tracemalloc.start()
+        sampler = _PeakSnapshots()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if output:
+                sampler.snapshot.dump(output)
+            megabyte = 1024 * 1024
+            print(f"Peak traced memory: {peak / megabyte:.1f} MB ({current / megabyte:.1f} MB still allocated "
+                  f"at the end); allocation sites at {sampler.snapshot_size / megabyte:.1f} MB:", file=sys.stderr)
+            for statistic in sampler.snapshot.statistics('lineno')[:top]:
+                print(statistic, file=sys.stderr)
+    else:
+        raise ValueError(f"Unknown profiling mode: {mode}")
@@ -0,0 +1,84 @@
+import json
+import os
+import re
+from typing import Dict, Iterator, Optional, Tuple
+
+from solution_cache import CachedResult
+
+# Appendable JSON-lines log with one record per solved (instance, method,
+# strategy), as an alternative to the two small _sol.txt/_stats.txt files per
+# run. Records use the column names of analyze.py, so it can load the log
+# directly:
+#
+#   instance, size, depth, combination, method, strategy, status, moves,
+#   solution_length, visited, processed, depth_reached, time_ms,
+#   weight, budget_used, suboptimality_bound
+#
+# `moves` is None and `solution_length` -1 when no solution was found; the
+# bounded-suboptimal statistics are None for the other methods, and `time_ms`
+# is None for results replayed from the solution cache (status 'cached'). A
+# rerun appends a new record, and readers keep the last one per (instance,
+# method, strategy).
+
+INSTANCE_NAME = re.compile(r'^([a-zA-Z0-9]+)_([0-9]+)_([0-9]+)$')
+
+# Records are written in blocks of this many bytes, not one write per solve
+BUFFER_SIZE = 1 << 20
+
+def result_record(instance: str, method: str, strategy: str, result: CachedResult, status: str) -> Dict:
+    # `instance` is the instance file name without extension, e.g. 4x4_07_00012;
+    # size, depth and combination are None for names not in that form
+    match = INSTANCE_NAME.match(instance)
+    size, depth, combination = (match.group(1), int(match.group(2)), int(match.group(3))) if match \
+        else (None, None, None)
+    weight, budget_used, bound = result.bounded_stats if result.bounded_stats is not None else (None,) * 3
+    return {
+        'instance': instance,
+        'size': size,
+        'depth': depth,
+        'combination': combination,
+        'method': method.lower(),
+        'strategy': strategy.lower(),
+        'status': status,
+        'moves': result.moves,
+        'solution_length': len(result.moves) if result.moves is not None else -1,
+        'visited': result.visited,
+        'processed': result.processed,
+        'depth_reached': result.max_depth,
+        'time_ms': round(result.duration_ms, 3) if result.duration_ms is not None else None,
+        'weight': weight,
+        'budget_used': budget_used,
+        'suboptimality_bound': bound,
+    }
+
+class ResultLog:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'a', buffering=BUFFER_SIZE)
+
+    def write(self, record: Dict):
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_result_log(path: str) -> Iterator[Dict]:
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                pass  # A record cut off by a killed run
+
+def logged_runs(path: Optional[str]) -> Dict[Tuple[str, str, str], str]:
+    # (instance, method, strategy) -> status of its last record in the log, if it exists
+    if not path or not os.path.exists(path):
+        return {}
+    return {(record['instance'], record['method'], record['strategy']): record['status']
+            for record in read_result_log(path)}
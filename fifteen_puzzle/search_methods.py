@@ -1,169 +1,539 @@
+from array import array
 from collections import deque
-from typing import List, Tuple, Set, Optional, Callable
-from board import Board
+from typing import Callable, Tuple, Optional
+from board import Board, BoardLayout, MOVES, INVERSE_MOVES, NO_MOVE
+from heuristics import create_heuristic
+from progress import CHECK_INTERVAL, Observer, ProgressReporter
 import heapq
+import time
+
+class NodeArena:
+    # Search tree stored as parallel arrays: the parent index and the 2-bit move
+    # code of every generated node. Frontiers only keep node indices, and the
+    # move string is rebuilt once, when the goal has been found.
+    def __init__(self):
+        self.parents = array('I', [0])  # Node 0 is the root
+        self.moves = array('B', [NO_MOVE])
+    
+    def add(self, parent: int, move: int) -> int:
+        self.parents.append(parent)
+        self.moves.append(move)
+        return len(self.moves) - 1
+    
+    def path(self, node: int) -> str:
+        moves = []
+        while node != 0:
+            moves.append(MOVES[self.moves[node]])
+            node = self.parents[node]
+        return "".join(reversed(moves))
+
+class HeapOpenList:
+    # Binary heap ordered by f, ties broken by insertion order (FIFO)
+    def __init__(self):
+        self.heap = []
+        self.counter = 0
+    
+    def push(self, f: int, g: int, item: tuple):
+        self.counter += 1
+        heapq.heappush(self.heap, (f, self.counter, g, item))
+    
+    def pop(self) -> Tuple[int, int, tuple]:
+        f, _, g, item = heapq.heappop(self.heap)
+        return f, g, item
+    
+    def peek_f(self) -> int:
+        # Lowest f in the list, which must not be empty
+        return self.heap[0][0]
+    
+    def __len__(self) -> int:
+        return len(self.heap)
+
+class BucketOpenList:
+    # f and g are small integers, so the open list is an array of buckets:
+    # buckets[f][g] is a stack of items. Pop takes the lowest f, and within it
+    # the highest g (the node closest to the goal), last in first out. Push and
+    # pop are O(1) apart from skipping empty buckets, and items need no f or
+    # tie-breaking counter.
+    def __init__(self):
+        self.buckets = []
+        self.min_f = 0
+        self.size = 0
+    
+    def push(self, f: int, g: int, item: tuple):
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+        by_g = self.buckets[f]
+        while len(by_g) <= g:
+            by_g.append([])
+        by_g[g].append(item)
+        self.size += 1
+        # An inconsistent heuristic can give a child a lower f than its parent
+        if f < self.min_f:
+            self.min_f = f
+    
+    def pop(self) -> Tuple[int, int, tuple]:
+        f = self.min_f
+        while True:
+            by_g = self.buckets[f]
+            # Drop exhausted g buckets so their lists are freed
+            while by_g and not by_g[-1]:
+                by_g.pop()
+            if by_g:
+                break
+            f += 1
+        self.min_f = f
+        self.size -= 1
+        return f, len(by_g) - 1, by_g[-1].pop()
+    
+    def peek_f(self) -> int:
+        # Lowest f in the list, which must not be empty
+        f = self.min_f
+        while not any(self.buckets[f]):
+            f += 1
+        self.min_f = f
+        return f
+    
+    def __len__(self) -> int:
+        return self.size
+
+OPEN_LISTS = {"heap": HeapOpenList, "buckets": BucketOpenList}
+
+# Default number of transposition table slots for iterative deepening; a prime,
+# so `state % size` depends on every cell of the packed state
+DEFAULT_TRANSPOSITION_SIZE = 1_000_003
+
+# ARA* lowers its weight by this much after every improved solution
+ARA_WEIGHT_STEP = 0.5
 
 class SearchMethod:
-    def __init__(self, search_strategy: str):
+    def __init__(self, search_strategy: str, verify_heuristic: bool = False, bfs_backend: str = "deque",
+                 observer: Optional[Observer] = None, progress_interval: float = 1.0, open_list: str = "heap",
+                 transposition_size: int = DEFAULT_TRANSPOSITION_SIZE, workers: int = 1,
+                 weight: float = 2.0, beam_width: int = 1000,
+                 node_budget: Optional[int] = None, time_budget: Optional[float] = None,
+                 bfs_memory_mb: int = 256, bfs_directory: Optional[str] = None):
         self.search_strategy = search_strategy.upper()
+        self.verify_heuristic = verify_heuristic  # Cross-check incremental h against a full rescan
+        self.bfs_backend = bfs_backend              # 'deque', 'numpy' (layer-synchronous) or 'disk'
+                                                    # (external-memory); both <= 16 cells
+        self.bfs_memory_mb = bfs_memory_mb          # RAM budget of the disk BFS backend
+        self.bfs_directory = bfs_directory          # Where it writes its layer files (None = temp directory)
+        self.observer = observer                    # Receives progress samples; None keeps the search silent
+        self.progress_interval = progress_interval  # Minimum seconds between two samples
+        self.open_list = open_list                  # A* open list: 'heap' or 'buckets' (see OPEN_LISTS)
+        self.transposition_size = transposition_size  # Slots in the iterative deepening transposition table
+        self.workers = workers                      # A* worker processes; more than 1 runs hash-distributed A*
+        self.weight = weight                        # Heuristic weight of weighted A* (initial weight for ARA*)
+        self.beam_width = beam_width                # Nodes kept per layer by beam search
+        self.node_budget = node_budget              # Processed nodes / seconds after which the bounded-
+        self.time_budget = time_budget              # suboptimal searches stop with their best solution
         self.visited_count = 0      # Number of states visited (added to visited set)
         self.processed_count = 0    # Number of states processed (popped from queue/stack)
         self.max_depth = 0          # Maximum recursion depth reached
+        # Set by the bounded-suboptimal searches only (None = not applicable)
+        self.weight_used = None             # Weight of the returned solution
+        self.budget_used = None             # Fraction of the node/time budget consumed
+        self.suboptimality_bound = None     # Solution length is proven <= bound * optimal length
     
-    def bfs(self, initial_board: Board) -> Tuple[Optional[Board], List[Tuple[int, int]]]:
-        queue = deque([(initial_board, [], 0)])  # (board, path, depth)
-        visited = set([initial_board.get_state_key()])
+    def bfs(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        if self.bfs_backend == "numpy":
+            return self._vectorized_bfs(initial_board)
+        elif self.bfs_backend == "disk":
+            return self._external_bfs(initial_board)
+        elif self.bfs_backend != "deque":
+            raise ValueError(f"Unknown BFS backend: {self.bfs_backend}")
+        
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        nodes = NodeArena()
+        queue = deque([(initial_board.state, initial_board.empty_index, 0, 0)])  # (state, blank, node, depth)
+        visited = set([initial_board.state])
+        # Moves by blank cell and last move code; the move back to the parent is never generated
+        move_table, last_moves = layout.move_table(self.search_strategy), nodes.moves
         self.visited_count = 1
         self.processed_count = 0
         self.max_depth = 0
+        progress = self._progress("bfs")
         
         while queue:
-            current_board, path, depth = queue.popleft()
+            state, blank, node, depth = queue.popleft()
             self.processed_count += 1
             self.max_depth = max(self.max_depth, depth)
             
-            # Debug printing (optional)
-            if self.processed_count % 1000 == 0:
-                print(f"Processed {self.processed_count} states, current depth: {depth}")
+            if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                progress.sample(self.processed_count, self.visited_count, len(queue), depth)
             
-            if current_board.is_solved():
-                return current_board, path
+            if state == goal_state:
+                return Board.from_state(layout, state, blank), nodes.path(node)
             
-            possible_moves = current_board.get_possible_moves(self.search_strategy)
-            
-            for new_empty_pos in possible_moves:
-                new_board = current_board.make_move(new_empty_pos)
-                new_state = new_board.get_state_key()
+            for target, move in move_table[blank][last_moves[node]]:
+                new_state = layout.apply_move(state, blank, target)
                 
                 if new_state not in visited:
                     visited.add(new_state)
                     self.visited_count += 1
-                    queue.append((new_board, path + [new_empty_pos], depth + 1))
+                    queue.append((new_state, target, nodes.add(node, move), depth + 1))
+        
+        return None, ""
+    
+    def _layer_done(self, progress: Optional[ProgressReporter]) -> Callable:
+        # Per-layer callback of the layered BFS backends. They only return their
+        # counts at the end, so the counters are kept current after every layer
+        # for a search stopped early (e.g. by a time limit) to report its work.
+        self.visited_count, self.processed_count, self.max_depth = 1, 0, 0
+        
+        def layer_done(processed: int, visited: int, frontier: int, depth: int):
+            self.processed_count, self.visited_count, self.max_depth = processed, visited, depth
+            if progress is not None:
+                progress.sample(processed, visited, frontier, depth)
+        return layer_done
+    
+    def _vectorized_bfs(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        # NumPy is only needed by this backend
+        from vectorized_bfs import layered_bfs
         
-        return None, []
+        layout = initial_board.layout
+        moves, self.visited_count, self.processed_count, self.max_depth = layered_bfs(
+            layout, initial_board.state, initial_board.empty_index, self.search_strategy,
+            self._layer_done(self._progress("bfs")))
+        if moves is None:
+            return None, ""
+        return Board.from_state(layout, layout.goal_state, layout.goal_blank), moves
     
-    def dfs(self, initial_board: Board, depth_limit: int = 50000) -> Tuple[Optional[Board], List[Tuple[int, int]]]:
+    def _external_bfs(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        from external_bfs import external_bfs
+        
+        # Duplicate detection and path recovery do not depend on a move order,
+        # so the search strategy does not matter for this backend
+        layout = initial_board.layout
+        moves, self.visited_count, self.processed_count, self.max_depth = external_bfs(
+            layout, initial_board.state, self.bfs_memory_mb, self.bfs_directory,
+            self._layer_done(self._progress("bfs")))
+        if moves is None:
+            return None, ""
+        return Board.from_state(layout, layout.goal_state, layout.goal_blank), moves
+    
+    def dfs(self, initial_board: Board, depth_limit: int = 50000) -> Tuple[Optional[Board], str]:
         # Ensure minimum depth limit of 20
         depth_limit = max(20, depth_limit)
         
-        # Initialize stack with the initial board, its path, and depth
-        stack = [(initial_board, [], 0)]  # (board, path, depth)
+        # Initialize stack with the initial board, its node in the arena, and depth
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        nodes = NodeArena()
+        stack = [(initial_board.state, initial_board.empty_index, 0, 0)]  # (state, blank, node, depth)
         
-        # Use a set for visited states for efficient look-up
-        visited = set([initial_board.get_state_key()])
+        # Use a set of packed states for efficient look-up
+        visited = set([initial_board.state])
+        move_table, last_moves = layout.move_table(self.search_strategy), nodes.moves
         self.visited_count = 1
         self.processed_count = 0
         self.max_depth = 0
+        progress = self._progress("dfs")
         
         while stack:
-            current_board, path, depth = stack.pop()
+            state, blank, node, depth = stack.pop()
             self.processed_count += 1
             self.max_depth = max(self.max_depth, depth)
             
-            # Debug print for monitoring progress (optional)
-            if self.processed_count % 1000 == 0:
-                print(f"Processed {self.processed_count} states, current depth: {depth}")
+            if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                progress.sample(self.processed_count, self.visited_count, len(stack), depth)
             
             # Check if the current board is solved
-            if current_board.is_solved():
-                return current_board, path
+            if state == goal_state:
+                return Board.from_state(layout, state, blank), nodes.path(node)
             
             # If we've reached the depth limit, backtrack
             if depth >= depth_limit:
                 continue
             
-            # Get possible moves (no need to reverse them manually later)
-            possible_moves = current_board.get_possible_moves(self.search_strategy)
-            
-            # Reuse the current path and only add new valid moves
-            for new_empty_pos in possible_moves:
-                new_board = current_board.make_move(new_empty_pos)
-                new_state = new_board.get_state_key()
+            # Get possible moves, except the one back to the parent (no need to reverse them manually later)
+            for target, move in move_table[blank][last_moves[node]]:
+                new_state = layout.apply_move(state, blank, target)
                 
                 # Only explore the new state if it's unvisited
                 if new_state not in visited:
                     visited.add(new_state)
                     self.visited_count += 1
-                    # Append to the stack with updated path
-                    stack.append((new_board, path + [new_empty_pos], depth + 1))
+                    # Append to the stack with a node pointing back at its parent
+                    stack.append((new_state, target, nodes.add(node, move), depth + 1))
         
         # No solution found within the given depth limit
-        return None, []
+        return None, ""
+    
+    def _depth_first(self, layout: BoardLayout, move_table, state: int, blank: int, value,
+                     child_value: Callable, progress: Optional[ProgressReporter],
+                     bound: Optional[int]) -> Optional[str]:
+        # One depth-first pass of IDDFS or IDA* from (state, blank). The single
+        # current state is changed in place by make/unmake moves, so memory only
+        # grows with the depth of the current branch.
+        # `child_value(value, state, new_state, blank, target, depth)` decides
+        # whether a child is expanded: it returns the value kept for the child
+        # (e.g. its h score; `value` is the root's), or None to prune it. Returns
+        # the moves to the goal, or None if this pass does not reach it.
+        goal_state = layout.goal_state
+        path = []                       # Move codes on the current branch
+        previous_blanks = []            # Blank cell before each move, used to unmake it
+        values = [value]                # child_value result of every state on the branch
+        frames = [iter(move_table[blank][NO_MOVE])]
+        
+        while frames:
+            target, move = next(frames[-1], (None, None))
+            
+            if target is None:
+                # All children tried: unmake the move that led here
+                frames.pop()
+                if path:
+                    previous_blank = previous_blanks.pop()
+                    state = layout.apply_move(state, blank, previous_blank)
+                    blank = previous_blank
+                    path.pop()
+                    values.pop()
+                continue
+            
+            new_state = layout.apply_move(state, blank, target)
+            depth = len(path) + 1
+            self.visited_count += 1
+            new_value = child_value(values[-1], state, new_state, blank, target, depth)
+            if new_value is None:
+                continue
+            
+            # Make the move in place
+            previous_blanks.append(blank)
+            state = new_state
+            blank = target
+            path.append(move)
+            values.append(new_value)
+            self.processed_count += 1
+            self.max_depth = max(self.max_depth, depth)
+            
+            if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                progress.sample(self.processed_count, self.visited_count, depth, depth, bound)
+            
+            if state == goal_state:
+                return "".join(MOVES[code] for code in path)
+            
+            # The move undoing the one that led here is left out of the table
+            frames.append(iter(move_table[blank][move]))
+        
+        return None
+    
+    def iddfs(self, initial_board: Board, depth_limit: Optional[int] = None) -> Tuple[Optional[Board], str]:
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        move_table = layout.move_table(self.search_strategy)
+        table_size = self.transposition_size
+        self.visited_count = 1
+        self.processed_count = 0
+        self.max_depth = 0
+        progress = self._progress("iddfs")
+        
+        if initial_board.state == goal_state:
+            return Board.from_state(layout, initial_board.state, initial_board.empty_index), ""
+        
+        # Each iteration is a depth-first search, in the configured move order, to
+        # one move deeper than the previous one, so the first solution found is a
+        # shortest one.
+        limit = 0
+        while depth_limit is None or limit < depth_limit:
+            limit += 1
+            
+            # Transposition table of fixed size: slot `state % size` holds a state
+            # and the smallest depth it was reached at in this iteration. A state
+            # reached again no shallower has already been searched with at least
+            # as many moves left. Slots are simply overwritten, so a collision only
+            # costs a repeated search, and memory does not grow with the run.
+            # States of boards up to 4x4 fit in 64 bits and are stored unboxed,
+            # 10 bytes per slot with the depth; 0 marks an empty slot, since only
+            # the blank is 0 in a packed state. Larger boards need a list of ints.
+            if layout.size * layout.bits <= 64:
+                table_states = array('Q', bytes(8 * table_size))
+            else:
+                table_states = [0] * table_size
+            table_depths = array('H', bytes(2 * table_size))
+            table_states[initial_board.state % table_size] = initial_board.state
+            cut_off = False                 # Whether any branch was stopped by the limit
+            
+            def child_value(value, state, new_state, blank, target, depth):
+                nonlocal cut_off
+                if new_state == goal_state:
+                    return 0
+                slot = new_state % table_size
+                if table_states[slot] == new_state and table_depths[slot] <= depth:
+                    return None
+                table_states[slot] = new_state
+                table_depths[slot] = depth
+                if depth == limit:
+                    cut_off = True
+                    return None
+                return 0
+            
+            self.processed_count += 1
+            moves = self._depth_first(layout, move_table, initial_board.state, initial_board.empty_index, 0,
+                                      child_value, progress, limit)
+            if moves is not None:
+                return Board.from_state(layout, goal_state, layout.goal_blank), moves
+            
+            # No branch reached the limit, so the whole space has been searched
+            if not cut_off:
+                return None, ""
+        
+        return None, ""
+    
+    def bidirectional_bfs(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        goal_board = Board.from_state(layout, goal_state, layout.goal_blank)
+        self.visited_count = 1
+        self.processed_count = 0
+        self.max_depth = 0
+        
+        if initial_board.state == goal_state:
+            return goal_board, ""
+        
+        # One search grows from the initial board and one from the solved board.
+        # Each side keeps its own arena, visited dict (state -> node) and layer.
+        sides = [
+            {"nodes": NodeArena(), "visited": {initial_board.state: 0},
+             "layer": [(initial_board.state, initial_board.empty_index, 0)], "depth": 0},
+            {"nodes": NodeArena(), "visited": {goal_state: 0},
+             "layer": [(goal_state, layout.goal_blank, 0)], "depth": 0},
+        ]
+        self.visited_count = 2
+        move_table = layout.move_table(self.search_strategy)
+        progress = self._progress("bbfs")
+        
+        while sides[0]["layer"] and sides[1]["layer"]:
+            # Expand one whole layer of the side with the smaller frontier
+            side = 0 if len(sides[0]["layer"]) <= len(sides[1]["layer"]) else 1
+            current, other = sides[side], sides[1 - side]
+            nodes, visited, other_visited = current["nodes"], current["visited"], other["visited"]
+            last_moves = nodes.moves
+            next_layer = []
+            best = None  # (length, forward node, backward node)
+            
+            for state, blank, node in current["layer"]:
+                self.processed_count += 1
+                
+                if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                    # Frontier: both current layers and the part of the next one built so far
+                    progress.sample(self.processed_count, self.visited_count,
+                                    len(sides[0]["layer"]) + len(sides[1]["layer"]) + len(next_layer),
+                                    sides[0]["depth"] + sides[1]["depth"])
+                
+                for target, move in move_table[blank][last_moves[node]]:
+                    new_state = layout.apply_move(state, blank, target)
+                    if new_state in visited:
+                        continue
+                    
+                    new_node = nodes.add(node, move)
+                    visited[new_state] = new_node
+                    self.visited_count += 1
+                    next_layer.append((new_state, target, new_node))
+                    
+                    if new_state in other_visited:
+                        # The layer has to be finished: a later meeting may reach
+                        # a shallower node of the other side
+                        other_node = other_visited[new_state]
+                        length = current["depth"] + 1 + len(other["nodes"].path(other_node))
+                        if best is None or length < best[0]:
+                            best = (length, new_node, other_node) if side == 0 else (length, other_node, new_node)
+            
+            current["layer"] = next_layer
+            current["depth"] += 1
+            self.max_depth = max(self.max_depth, current["depth"])
+            
+            if best is not None:
+                # Forward moves up to the meeting state, then the backward moves
+                # reversed and inverted to walk from there to the solved board
+                forward_path = sides[0]["nodes"].path(best[1])
+                backward_path = sides[1]["nodes"].path(best[2])
+                return goal_board, forward_path + backward_path[::-1].translate(INVERSE_MOVES)
+        
+        return None, ""
     
-    def hamming_distance(self, board: Board) -> int:
+    def hamming_distance(self, state: int, layout: BoardLayout) -> int:
         distance = 0
-        expected_value = 1
-        
-        for i in range(board.height):
-            for j in range(board.width):
-                if i == board.height - 1 and j == board.width - 1:
-                    # Last position should be empty
-                    if not board.get_element(i, j).is_empty():
-                        distance += 1
-                else:
-                    if board.get_element(i, j).value != expected_value:
-                        distance += 1
-                    expected_value += 1
+        goal_values = layout.unpack(layout.goal_state)
+        
+        # Every cell (including the empty one) that differs from the goal counts
+        for value, expected_value in zip(layout.unpack(state), goal_values):
+            if value != expected_value:
+                distance += 1
         
         return distance
     
-    def manhattan_distance(self, board: Board) -> int:
+    def manhattan_distance(self, state: int, layout: BoardLayout) -> int:
         distance = 0
         
-        for i in range(board.height):
-            for j in range(board.width):
-                value = board.get_element(i, j).value
-                if value == 0:  # Skip empty tile
-                    continue
-                
-                # Calculate expected position for this value
-                expected_row = (value - 1) // board.width
-                expected_col = (value - 1) % board.width
-                
-                # Add Manhattan distance for this tile
-                distance += abs(i - expected_row) + abs(j - expected_col)
+        for index, value in enumerate(layout.unpack(state)):
+            if value == 0:  # Skip empty tile
+                continue
+            
+            # Calculate current and expected position for this value
+            row, col = divmod(index, layout.width)
+            expected_row, expected_col = divmod(value - 1, layout.width)
+            
+            # Add Manhattan distance for this tile
+            distance += abs(row - expected_row) + abs(col - expected_col)
         
         return distance
     
-    def a_star(self, initial_board: Board) -> Tuple[Optional[Board], List[Tuple[int, int]]]:
-        # Determine which heuristic to use
-        if self.search_strategy.lower() == "manh":
-            heuristic = self.manhattan_distance
-        elif self.search_strategy.lower() == "hamm":
-            heuristic = self.hamming_distance
-        else:
-            raise ValueError("A* search requires 'manh' or 'hamm' as search strategy")
-        
-        # Initialize priority queue with (f_score, counter, board, path, g_score)
-        # counter is used to break ties when f_scores are equal
-        initial_f_score = heuristic(initial_board)
-        counter = 0
-        priority_queue = [(initial_f_score, counter, initial_board, [], 0)]
-        heapq.heapify(priority_queue)
+    def _progress(self, method: str) -> Optional[ProgressReporter]:
+        # The search loops only sample progress when an observer is attached
+        if self.observer is None:
+            return None
+        return ProgressReporter(self.observer, method, self.progress_interval)
+    
+    def _select_heuristic(self, layout: BoardLayout):
+        # Look the heuristic up in the registry; returns the incremental heuristic
+        # and the full computation used as a debug cross-check
+        heuristic = create_heuristic(self.search_strategy.lower(), layout)
+        reference_heuristics = {"manh": self.manhattan_distance, "hamm": self.hamming_distance}
+        full_heuristic = reference_heuristics.get(self.search_strategy.lower(),
+                                                  lambda state, layout: heuristic.evaluate(state))
+        return heuristic, full_heuristic
+    
+    def a_star(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        
+        heuristic, full_heuristic = self._select_heuristic(layout)
+        if self.open_list not in OPEN_LISTS:
+            raise ValueError(f"Unknown open list: {self.open_list}")
+        if self.workers > 1:
+            return self._parallel_a_star(initial_board)
+        
+        # Initialize the open list with (state, blank, node, h_score), ordered by
+        # f_score and g_score
+        initial_h_score = heuristic.evaluate(initial_board.state)
+        nodes = NodeArena()
+        priority_queue = OPEN_LISTS[self.open_list]()
+        priority_queue.push(initial_h_score, 0, (initial_board.state, initial_board.empty_index, 0, initial_h_score))
+        move_table, last_moves = layout.move_table("LRUD"), nodes.moves  # Use all directions for A*
         
         # Track visited states and their g_scores
-        visited = {initial_board.get_state_key(): 0}
+        visited = {initial_board.state: 0}
         self.visited_count = 1
         self.processed_count = 0
         self.max_depth = 0
+        progress = self._progress("astr")
         
         while priority_queue:
-            f_score, _, current_board, path, g_score = heapq.heappop(priority_queue)
+            f_score, g_score, (state, blank, node, h_score) = priority_queue.pop()
             self.processed_count += 1
-            self.max_depth = max(self.max_depth, len(path))
-            
-            # Debug printing (optional)
-            if self.processed_count % 1000 == 0:
-                print(f"Processed {self.processed_count} states, current depth: {len(path)}")
+            self.max_depth = max(self.max_depth, g_score)
             
-            if current_board.is_solved():
-                return current_board, path
+            if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                progress.sample(self.processed_count, self.visited_count, len(priority_queue), g_score, f_score)
             
-            possible_moves = current_board.get_possible_moves("LRUD")  # Use all directions for A*
+            if state == goal_state:
+                return Board.from_state(layout, state, blank), nodes.path(node)
             
-            for new_empty_pos in possible_moves:
-                new_board = current_board.make_move(new_empty_pos)
-                new_state = new_board.get_state_key()
+            # Going back to the parent never improves its g_score, so that move is skipped
+            for target, move in move_table[blank][last_moves[node]]:
+                tile = layout.tile_at(state, target)
+                new_state = layout.apply_move(state, blank, target)
                 new_g_score = g_score + 1
                 
                 # Only explore if this path is better than any previous path to this state
@@ -171,14 +541,308 @@ class SearchMethod:
                     visited[new_state] = new_g_score
                     self.visited_count += 1
                     
-                    # Calculate f_score for the new state
-                    new_f_score = new_g_score + heuristic(new_board)
+                    # Update the parent's h_score with the single moved tile
+                    new_h_score = heuristic.update(h_score, new_state, tile, blank, target)
+                    if self.verify_heuristic and new_h_score != full_heuristic(new_state, layout):
+                        raise RuntimeError(f"Incremental heuristic mismatch: {new_h_score} != "
+                                           f"{full_heuristic(new_state, layout)}")
+                    new_f_score = new_g_score + new_h_score
                     
-                    # Increment counter to ensure unique ordering
-                    counter += 1
+                    priority_queue.push(new_f_score, new_g_score, (new_state, target, nodes.add(node, move), new_h_score))
+        
+        return None, ""
+    
+    def _parallel_a_star(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        # Worker processes are only started by this mode
+        from parallel_astar import parallel_a_star
+        
+        layout = initial_board.layout
+        progress = self._progress("astr")
+        moves, self.visited_count, self.processed_count, self.max_depth = parallel_a_star(
+            layout, initial_board.state, initial_board.empty_index, self.search_strategy.lower(),
+            self.workers, self.open_list, progress.sample if progress is not None else None)
+        if moves is None:
+            return None, ""
+        return Board.from_state(layout, layout.goal_state, layout.goal_blank), moves
+    
+    def _budget_spent(self, start_time: float) -> bool:
+        # Updates budget_used (the larger fraction of the node and time budgets
+        # used so far) and tells whether a budget has run out
+        used = []
+        if self.node_budget:
+            used.append(self.processed_count / self.node_budget)
+        if self.time_budget:
+            used.append((time.perf_counter() - start_time) / self.time_budget)
+        self.budget_used = max(used) if used else None
+        return self.budget_used is not None and self.budget_used >= 1
+    
+    def weighted_a_star(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        heuristic, _ = self._select_heuristic(layout)
+        weight = self.weight
+        start_time = time.perf_counter()
+        node_budget = self.node_budget or -1
+        
+        # A* ordered by f = g + weight * h. With an admissible heuristic the first
+        # solution is at most `weight` times longer than an optimal one.
+        initial_h_score = heuristic.evaluate(initial_board.state)
+        nodes = NodeArena()
+        move_table, last_moves = layout.move_table("LRUD"), nodes.moves
+        priority_queue = HeapOpenList()
+        priority_queue.push(weight * initial_h_score, 0, (initial_board.state, initial_board.empty_index, 0, initial_h_score))
+        visited = {initial_board.state: 0}
+        self.visited_count = 1
+        self.processed_count = 0
+        self.max_depth = 0
+        progress = self._progress("wastr")
+        
+        while priority_queue:
+            f_score, g_score, (state, blank, node, h_score) = priority_queue.pop()
+            self.processed_count += 1
+            self.max_depth = max(self.max_depth, g_score)
+            
+            if state == goal_state:
+                self._budget_spent(start_time)
+                self.weight_used = weight
+                # A weight below 1 only scales an admissible heuristic down, which keeps it admissible
+                self.suboptimality_bound = max(weight, 1.0)
+                return Board.from_state(layout, state, blank), nodes.path(node)
+            
+            if ((self.processed_count % CHECK_INTERVAL == 0 or self.processed_count == node_budget)
+                    and self._budget_spent(start_time)):
+                break
+            if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                progress.sample(self.processed_count, self.visited_count, len(priority_queue), g_score, f_score)
+            
+            for target, move in move_table[blank][last_moves[node]]:
+                tile = layout.tile_at(state, target)
+                new_state = layout.apply_move(state, blank, target)
+                new_g_score = g_score + 1
+                
+                # States are reopened when a shorter path to them is found
+                if new_state not in visited or new_g_score < visited[new_state]:
+                    visited[new_state] = new_g_score
+                    self.visited_count += 1
+                    new_h_score = heuristic.update(h_score, new_state, tile, blank, target)
+                    priority_queue.push(new_g_score + weight * new_h_score, new_g_score,
+                                        (new_state, target, nodes.add(node, move), new_h_score))
+        
+        # Budget exhausted (or no solution) before reaching the goal
+        return None, ""
+    
+    def anytime_a_star(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        # Anytime repairing A* (ARA*): a series of weighted A* searches with a
+        # decreasing weight. Each search reuses the previous one's work: states
+        # whose g improved after they were expanded are kept aside (INCONS) and
+        # reopened for the next weight. After every search the solution found is
+        # proven to be at most `suboptimality_bound` times longer than optimal.
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        heuristic, _ = self._select_heuristic(layout)
+        start_time = time.perf_counter()
+        node_budget = self.node_budget or -1
+        
+        nodes = NodeArena()
+        last_moves = nodes.moves
+        move_table = layout.move_table("LRUD")
+        initial_h_score = heuristic.evaluate(initial_board.state)
+        g_scores = {initial_board.state: 0}
+        tree_nodes = {initial_board.state: 0}       # State -> arena node of its best path
+        open_states = {initial_board.state: (initial_board.empty_index, initial_h_score)}  # State -> (blank, h)
+        inconsistent = {}                           # Expanded states whose g improved since
+        closed = set()
+        best_path = None
+        self.visited_count = 1
+        self.processed_count = 0
+        self.max_depth = 0
+        progress = self._progress("arastr")
+        
+        weight = self.weight
+        out_of_budget = False
+        while True:
+            # Rebuild the open list with the current weight; entries are
+            # (f, counter, state, g) and stale once the state's g has changed
+            counter = 0
+            priority_queue = []
+            for state, (blank, h_score) in open_states.items():
+                counter += 1
+                priority_queue.append((g_scores[state] + weight * h_score, counter, state, g_scores[state]))
+            heapq.heapify(priority_queue)
+            
+            # Improve the path until no open state can lead to a better solution
+            while priority_queue:
+                f_score, _, state, g_score = priority_queue[0]
+                if state not in open_states or g_score != g_scores[state]:
+                    heapq.heappop(priority_queue)
+                    continue
+                if f_score >= g_scores.get(goal_state, float("inf")):
+                    break
+                
+                heapq.heappop(priority_queue)
+                blank, h_score = open_states.pop(state)
+                closed.add(state)
+                node = tree_nodes[state]
+                self.processed_count += 1
+                self.max_depth = max(self.max_depth, g_score)
+                
+                if ((self.processed_count % CHECK_INTERVAL == 0 or self.processed_count == node_budget)
+                        and self._budget_spent(start_time)):
+                    # Not expanded, so it stays open for the bound below
+                    open_states[state] = (blank, h_score)
+                    closed.discard(state)
+                    out_of_budget = True
+                    break
+                if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                    progress.sample(self.processed_count, self.visited_count, len(open_states), g_score, f_score)
+                
+                for target, move in move_table[blank][last_moves[node]]:
+                    tile = layout.tile_at(state, target)
+                    new_state = layout.apply_move(state, blank, target)
+                    new_g_score = g_score + 1
+                    if new_state in g_scores and new_g_score >= g_scores[new_state]:
+                        continue
                     
-                    # Add to priority queue with counter to break ties
-                    heapq.heappush(priority_queue, (new_f_score, counter, new_board, path + [new_empty_pos], new_g_score))
+                    g_scores[new_state] = new_g_score
+                    tree_nodes[new_state] = nodes.add(node, move)
+                    self.visited_count += 1
+                    new_h_score = heuristic.update(h_score, new_state, tile, blank, target)
+                    if new_state in closed:
+                        inconsistent[new_state] = (target, new_h_score)
+                    else:
+                        open_states[new_state] = (target, new_h_score)
+                        counter += 1
+                        heapq.heappush(priority_queue, (new_g_score + weight * new_h_score, counter,
+                                                        new_state, new_g_score))
+            
+            # Publish the best solution so far with its proven bound: no
+            # solution can be shorter than the smallest g + h still open. This
+            # is also done when the budget ran out in the middle of a search,
+            # which may already have improved the path to the goal.
+            if goal_state in g_scores:
+                if best_path is None or g_scores[goal_state] < len(best_path):
+                    best_path = nodes.path(tree_nodes[goal_state])
+                    self.weight_used = weight
+                lower_bound = min((g_scores[state] + h_score
+                                   for states in (open_states, inconsistent)
+                                   for state, (_, h_score) in states.items()), default=len(best_path))
+                bound = len(best_path) / lower_bound if lower_bound else 1.0
+                if out_of_budget:
+                    # An unfinished search does not prove its weight, but the
+                    # bounds of the finished ones still hold for a shorter path
+                    if self.suboptimality_bound is not None:
+                        bound = min(self.suboptimality_bound, bound)
+                else:
+                    bound = min(max(weight, 1.0), bound)
+                self.suboptimality_bound = bound
+            
+            if out_of_budget or weight <= 1 or self.suboptimality_bound == 1:
+                break
+            weight = max(1.0, weight - ARA_WEIGHT_STEP)
+            open_states.update(inconsistent)
+            inconsistent = {}
+            closed = set()
         
-        return None, []
-
+        self._budget_spent(start_time)
+        if best_path is None:
+            return None, ""
+        return Board.from_state(layout, goal_state, layout.goal_blank), best_path
+    
+    def beam_search(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        # Breadth-first search that keeps only the `beam_width` children with the
+        # lowest h of every layer. Memory is bounded by width * depth, but the
+        # solution is not guaranteed to be short, or to be found at all.
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        heuristic, _ = self._select_heuristic(layout)
+        start_time = time.perf_counter()
+        node_budget = self.node_budget or -1
+        
+        nodes = NodeArena()
+        move_table, last_moves = layout.move_table("LRUD"), nodes.moves
+        layer = [(heuristic.evaluate(initial_board.state), 0, initial_board.state, initial_board.empty_index, 0)]
+        visited = {initial_board.state}
+        self.visited_count = 1
+        self.processed_count = 0
+        self.max_depth = 0
+        progress = self._progress("beam")
+        
+        depth = 0
+        while layer:
+            children = []
+            for h_score, _, state, blank, node in layer:
+                self.processed_count += 1
+                if state == goal_state:
+                    self._budget_spent(start_time)
+                    return Board.from_state(layout, state, blank), nodes.path(node)
+                
+                if ((self.processed_count % CHECK_INTERVAL == 0 or self.processed_count == node_budget)
+                        and self._budget_spent(start_time)):
+                    return None, ""
+                if progress is not None and self.processed_count % CHECK_INTERVAL == 0:
+                    progress.sample(self.processed_count, self.visited_count, len(layer) + len(children), depth)
+                
+                for target, move in move_table[blank][last_moves[node]]:
+                    tile = layout.tile_at(state, target)
+                    new_state = layout.apply_move(state, blank, target)
+                    if new_state not in visited:
+                        visited.add(new_state)
+                        self.visited_count += 1
+                        # Generation order breaks ties between equal h
+                        children.append((heuristic.update(h_score, new_state, tile, blank, target),
+                                         len(children), new_state, target, nodes.add(node, move)))
+            
+            layer = heapq.nsmallest(self.beam_width, children)
+            depth += 1
+            self.max_depth = depth
+        
+        self._budget_spent(start_time)
+        return None, ""
+    
+    def ida_star(self, initial_board: Board) -> Tuple[Optional[Board], str]:
+        layout = initial_board.layout
+        goal_state = layout.goal_state
+        heuristic, full_heuristic = self._select_heuristic(layout)
+        
+        initial_h_score = heuristic.evaluate(initial_board.state)
+        bound = initial_h_score
+        self.visited_count = 0
+        self.processed_count = 0
+        self.max_depth = 0
+        progress = self._progress("idas")
+        move_table = layout.move_table("LRUD")
+        
+        # Each iteration is a depth-first search limited by f = g + h <= bound;
+        # the value kept for every state on the branch is its h score
+        while True:
+            next_bound = None
+            
+            def child_value(h_score, state, new_state, blank, target, depth):
+                nonlocal next_bound
+                tile = layout.tile_at(state, target)
+                new_h_score = heuristic.update(h_score, new_state, tile, blank, target)
+                new_f_score = depth + new_h_score
+                if new_f_score > bound:
+                    # Remember the smallest f that exceeded the bound for the next iteration
+                    if next_bound is None or new_f_score < next_bound:
+                        next_bound = new_f_score
+                    return None
+                if self.verify_heuristic and new_h_score != full_heuristic(new_state, layout):
+                    raise RuntimeError(f"Incremental heuristic mismatch: {new_h_score} != "
+                                       f"{full_heuristic(new_state, layout)}")
+                return new_h_score
+            
+            self.visited_count += 1
+            self.processed_count += 1
+            if initial_board.state == goal_state:
+                return Board.from_state(layout, initial_board.state, initial_board.empty_index), ""
+            
+            moves = self._depth_first(layout, move_table, initial_board.state, initial_board.empty_index,
+                                      initial_h_score, child_value, progress, bound)
+            if moves is not None:
+                return Board.from_state(layout, goal_state, layout.goal_blank), moves
+            
+            # Nothing was cut off by the bound, so the whole space has been searched
+            if next_bound is None:
+                return None, ""
+            bound = next_bound
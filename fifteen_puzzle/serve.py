@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, List, Optional
+
+from batch import POOL_RESTARTS, init_worker, solve_board
+from board import Board, get_layout
+from heuristics import HEURISTICS, create_heuristic
+from main import SEARCH_METHODS, HEURISTIC_METHODS
+from solution_cache import SolutionCache, DEFAULT_MAX_ENTRIES
+
+# Long-lived solver: one process pool whose workers keep their heuristic
+# tables and solution cache connection between requests. Requests and
+# responses are JSON lines, read from stdin or from clients of a Unix socket:
+#
+#   {"id": 1, "board": [[1, 2, 3], [4, 5, 6], [7, 0, 8]], "method": "astr",
+#    "strategy": "manh", "time_limit": 10, "options": {"open_list": "buckets"}}
+#
+#   {"id": 1, "status": "ok", "moves": "R", "length": 1, "visited": 3, ...}
+#
+# Requests are solved concurrently, so responses come in completion order and
+# carry the request's "id". "options" are SearchMethod keyword arguments.
+# A request that cannot be solved gets {"status": "error", "error": ...}.
+
+# SearchMethod options a request may set
+REQUEST_OPTIONS = ['bfs_backend', 'bfs_memory_mb', 'open_list', 'transposition_size', 'weight',
+                   'beam_width', 'node_budget', 'time_budget']
+
+_cache: Optional[SolutionCache] = None  # Per worker process
+
+def init_serve_worker(memory_limit_mb: Optional[int], cache_path: Optional[str], cache_size: int,
+                      preload: List[str]):
+    global _cache
+    init_worker(memory_limit_mb)
+    # Interrupts are handled by the server, which shuts the pool down; workers
+    # forked after serve_socket installed its SIGTERM handler must not inherit it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if cache_path:
+        _cache = SolutionCache(cache_path, cache_size)
+    # Build the heuristic tables up front instead of on the first request
+    for size in preload:
+        height, width = map(int, size.lower().split('x'))
+        for name in HEURISTICS:
+            try:
+                create_heuristic(name, get_layout(height, width))
+            except FileNotFoundError:
+                pass  # Pattern database tables that have not been built
+            except ValueError:
+                pass  # Heuristics that do not support this board size
+
+def solve_request(request: dict, default_options: dict) -> dict:
+    response = {'id': request.get('id')}
+    try:
+        board = Board(request['board'])
+        method = request['method'].lower()
+        strategy = request['strategy']
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method: {method}")
+        if method in HEURISTIC_METHODS and strategy.lower() not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic '{strategy}'; valid heuristics are {', '.join(HEURISTICS)}")
+        options = dict(default_options)
+        for name, value in request.get('options', {}).items():
+            if name not in REQUEST_OPTIONS:
+                raise ValueError(f"Unknown option: {name}")
+            options[name] = value
+
+        result, status = solve_board(board, method, strategy, request.get('time_limit'), options, _cache)
+    except (KeyError, TypeError, ValueError, FileNotFoundError) as e:
+        response.update(status='error', error=str(e) if not isinstance(e, KeyError) else f"Missing field: {e}")
+        return response
+
+    response.update(status=status, moves=result.moves,
+                    length=len(result.moves) if result.moves is not None else -1,
+                    visited=result.visited, processed=result.processed, max_depth=result.max_depth,
+                    duration_ms=round(result.duration_ms, 3) if result.duration_ms is not None else None)
+    if result.bounded_stats is not None:
+        response.update(zip(['weight', 'budget_used', 'suboptimality_bound'], result.bounded_stats))
+    return response
+
+class Server:
+    # Hands parsed requests to the pool; each response is passed to `write` as
+    # soon as its request is done. The returned future completes once the
+    # response has been written.
+    #
+    # A worker that dies (memory limit, OOM killer, crash) breaks the whole
+    # pool, so the pool is replaced by a new one from `new_executor`, and the
+    # requests that were in it are run again. A request that has been in
+    # POOL_RESTARTS broken pools runs in a one-worker pool of its own, and is
+    # answered with status 'crashed' if that one breaks too.
+    def __init__(self, new_executor: Callable[[], ProcessPoolExecutor], default_options: dict):
+        self.new_executor = new_executor
+        self.executor = new_executor()
+        self.lock = threading.Lock()
+        self.default_options = default_options
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        # Every request of the broken pool calls this; only the first replaces it
+        with self.lock:
+            if self.executor is broken:
+                broken.shutdown(wait=False)
+                self.executor = self.new_executor()
+                print("A worker process died; started a new pool", file=sys.stderr)
+
+    def shutdown(self):
+        with self.lock:
+            executor = self.executor
+        executor.shutdown()
+
+    def submit(self, line: str, write: Callable[[dict], None]) -> Future:
+        written = Future()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+        except ValueError as e:
+            write({'id': None, 'status': 'error', 'error': f"Invalid request: {e}"})
+            written.set_result(None)
+            return written
+        self._run(request, write, written, 0)
+        return written
+
+    def _run(self, request: dict, write: Callable[[dict], None], written: Future, restarts: int):
+        isolated = restarts >= POOL_RESTARTS
+        executor = self.new_executor(max_workers=1) if isolated else self.executor
+        try:
+            future = executor.submit(solve_request, request, self.default_options)
+        except BrokenProcessPool:
+            # Broken before its other requests have noticed
+            self._restart(executor)
+            self._run(request, write, written, restarts)
+            return
+
+        def done(future: Future):
+            try:
+                response = future.result()
+            except BrokenProcessPool:
+                if not isolated:
+                    self._restart(executor)
+                    self._run(request, write, written, restarts + 1)
+                    return
+                response = {'id': request.get('id'), 'status': 'crashed',
+                            'error': "The worker process died (e.g. killed by the memory limit)"}
+            except Exception as e:
+                response = {'id': request.get('id'), 'status': 'error', 'error': repr(e)}
+            try:
+                write(response)
+            finally:
+                written.set_result(None)
+                if isolated:
+                    executor.shutdown(wait=False)
+        future.add_done_callback(done)
+
+def line_writer(stream) -> Callable[[dict], None]:
+    # Responses are written from the pool's result thread, one whole line at a time
+    lock = threading.Lock()
+
+    def write(response: dict):
+        with lock:
+            stream.write(json.dumps(response) + "\n")
+            stream.flush()
+    return write
+
+def serve_stdin(server: Server):
+    write = line_writer(sys.stdout)
+    futures = [server.submit(line, write) for line in sys.stdin if line.strip()]
+    # End of input: answer everything that is still running, then exit
+    wait(futures)
+
+class _SocketText:
+    # Text adapter over a socket's binary write file, for line_writer
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str):
+        try:
+            self.stream.write(text.encode())
+        except OSError:
+            pass  # The client disconnected; its remaining responses are dropped
+
+    def flush(self):
+        try:
+            self.stream.flush()
+        except OSError:
+            pass
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt()
+
+def serve_socket(server: Server, path: str):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            write_line = line_writer(_SocketText(self.wfile))
+            futures = [server.submit(line.decode(), write_line) for line in self.rfile if line.strip()]
+            # The connection is closed when this returns
+            wait(futures)
+
+    # Stop cleanly, removing the socket file, on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, _interrupt)
+    if os.path.exists(path):
+        os.remove(path)  # Left over from a server that was killed
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+        unix_server.daemon_threads = True
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve JSON-lines requests from stdin or a Unix socket "
+                                                 "with a pool of warm solver processes")
+    parser.add_argument('--socket', metavar='PATH', default=None,
+                        help="listen on this Unix socket instead of reading stdin")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--memory-limit', type=int, default=None, help="address space per worker in MB")
+    parser.add_argument('--preload', nargs='*', default=['3x3', '4x4'], metavar='HxW',
+                        help="board sizes whose heuristic tables are built at startup (default: 3x3 4x4)")
+    parser.add_argument('--bfs-backend', choices=['deque', 'numpy', 'disk'], default='deque',
+                        help="default BFS engine; requests can override it in 'options'")
+    parser.add_argument('--open-list', choices=['heap', 'buckets'], default='heap',
+                        help="default A* open list; requests can override it in 'options'")
+    parser.add_argument('--cache', metavar='FILE', default=None,
+                        help="reuse finished searches from this SQLite file and store new ones (off by default)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="maximum number of cached results; least recently used ones are evicted")
+    args = parser.parse_args()
+
+    if args.socket and not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        print("Error: Unix sockets are not supported on this platform; use stdin instead")
+        sys.exit(1)
+
+    if args.cache:
+        SolutionCache.prepare(args.cache)
+
+    server = Server(partial(ProcessPoolExecutor, max_workers=args.workers, initializer=init_serve_worker,
+                            initargs=(args.memory_limit, args.cache, args.cache_size, args.preload)),
+                    {'bfs_backend': args.bfs_backend, 'open_list': args.open_list})
+    try:
+        if args.socket:
+            serve_socket(server, args.socket)
+        else:
+            serve_stdin(server)
+    finally:
+        server.shutdown()
@@ -0,0 +1,115 @@
+import sqlite3
+import time
+from typing import NamedTuple, Optional
+
+from board import Board
+from search_methods import DEFAULT_TRANSPOSITION_SIZE
+
+# Optional persistent cache of finished searches (--cache FILE), keyed by
+# (board shape, packed initial state, method, strategy) and CACHE_VERSION. It
+# stores the move string (None if there is no solution) and the visited,
+# processed and max depth counts of the original run, and replays them for the
+# same key instead of searching again. The durations are not stored: a cached
+# result was not timed, so its duration is None and written as -1, which
+# analyze.py ignores. The least recently used entries are evicted once the cache
+# holds more than `max_entries` results.
+
+# Bump whenever a change to the search methods can change their paths or
+# statistics; rows written under another version are dropped on open
+CACHE_VERSION = 3
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# SearchMethod options that change the returned path or statistics, with their
+# defaults; non-default values become part of the cached method name
+RESULT_OPTIONS = {'bfs_backend': 'deque', 'open_list': 'heap', 'transposition_size': DEFAULT_TRANSPOSITION_SIZE}
+
+def method_key(method: str, search_options: dict) -> str:
+    options = [f"{name}={search_options[name]}" for name, default in RESULT_OPTIONS.items()
+               if search_options.get(name, default) != default]
+    return ":".join([method.lower()] + options)
+
+class CachedResult(NamedTuple):
+    moves: Optional[str]
+    visited: int
+    processed: int
+    max_depth: int
+    duration_ms: Optional[float]  # None for results replayed from the cache
+    bounded_stats: Optional[tuple] = None  # Extra info-file stats; such results are not cached
+
+_COLUMNS = ['version', 'shape', 'state', 'method', 'strategy', 'moves', 'visited', 'processed', 'max_depth',
+            'last_used']
+
+class SolutionCache:
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        # Batch workers share the file; wait for their writes instead of failing
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # A table of an older layout is dropped as a whole
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(solutions)")]
+        if columns and columns != _COLUMNS:
+            self.connection.execute("DROP TABLE solutions")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS solutions (
+                version INTEGER NOT NULL,
+                shape TEXT NOT NULL,
+                state TEXT NOT NULL,
+                method TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                moves TEXT,
+                visited INTEGER NOT NULL,
+                processed INTEGER NOT NULL,
+                max_depth INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (version, shape, state, method, strategy)
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+        # Results of other code versions would not match what a search returns now
+        self.connection.execute("DELETE FROM solutions WHERE version != ?", (CACHE_VERSION,))
+        self.connection.commit()
+
+    @classmethod
+    def prepare(cls, path: str):
+        # Creates (or migrates) the file and table once, in the parent process,
+        # before pool workers opening it at the same time race to do it
+        cls(path).close()
+
+    @staticmethod
+    def _key(board: Board, method: str, strategy: str) -> tuple:
+        # States wider than 64 bits do not fit an SQLite integer, so use hex text
+        return (CACHE_VERSION, f"{board.height}x{board.width}", format(board.state, 'x'), method.lower(),
+                strategy.upper())
+
+    def get(self, board: Board, method: str, strategy: str) -> Optional[CachedResult]:
+        key = self._key(board, method, strategy)
+        row = self.connection.execute(
+            "SELECT moves, visited, processed, max_depth FROM solutions "
+            "WHERE version = ? AND shape = ? AND state = ? AND method = ? AND strategy = ?", key).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE solutions SET last_used = ? "
+            "WHERE version = ? AND shape = ? AND state = ? AND method = ? AND strategy = ?",
+            (time.time(),) + key)
+        self.connection.commit()
+        return CachedResult(*row, duration_ms=None)
+
+    def put(self, board: Board, method: str, strategy: str, result: CachedResult):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._key(board, method, strategy) + tuple(result[:4]) + (time.time(),))
+        # Evict the least recently used entries beyond the size bound
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM solutions WHERE rowid IN "
+                "(SELECT rowid FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
+        self.connection.commit()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
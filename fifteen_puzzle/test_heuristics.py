@@ -0,0 +1,70 @@
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+from board import get_layout
+from heuristics import HEURISTICS, create_heuristic
+from pattern_db import PatternDatabase, build_table, parse_partition, rank, save_table, table_filename, \
+    table_size, unrank
+
+# Run from this directory with `python -m pytest` or `python -m unittest`
+
+SIZES = [(2, 3), (3, 3)]
+
+class RankTest(unittest.TestCase):
+    def test_round_trip_covers_the_table(self):
+        for cells, group_size in [(6, 1), (6, 3), (9, 4)]:
+            with self.subTest(cells=cells, group_size=group_size):
+                ranks = set()
+                for positions in itertools.permutations(range(cells), group_size):
+                    value = rank(positions, cells)
+                    self.assertEqual(unrank(value, group_size, cells), list(positions))
+                    ranks.add(value)
+                self.assertEqual(ranks, set(range(table_size(cells, group_size))))
+
+class IncrementalUpdateTest(unittest.TestCase):
+    # Every heuristic's update after a move has to match a full evaluation
+    WALK_LENGTH = 2000
+
+    @classmethod
+    def setUpClass(cls):
+        # The pattern databases of the small boards are built into a temporary
+        # directory, so the test does not depend on tables built beforehand
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.pattern_databases = {}
+        for height, width in SIZES:
+            layout = get_layout(height, width)
+            for group in parse_partition(layout):
+                save_table(os.path.join(cls.directory.name, table_filename(layout, group)),
+                           layout, group, build_table(layout, group))
+            cls.pattern_databases[height, width] = PatternDatabase(layout, directory=cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def heuristic(self, name: str, height: int, width: int):
+        if name == 'pdb':
+            return self.pattern_databases[height, width]
+        return create_heuristic(name, get_layout(height, width))
+
+    def test_update_matches_evaluate(self):
+        for (height, width), name in itertools.product(SIZES, HEURISTICS):
+            layout = get_layout(height, width)
+            heuristic = self.heuristic(name, height, width)
+            rng = random.Random(height * width)
+            state, blank = layout.goal_state, layout.goal_blank
+            value = heuristic.evaluate(state)
+            with self.subTest(size=f"{height}x{width}", heuristic=name):
+                for _ in range(self.WALK_LENGTH):
+                    target = rng.choice(layout.neighbors(blank))
+                    tile = layout.tile_at(state, target)
+                    state = layout.apply_move(state, blank, target)
+                    value = heuristic.update(value, state, tile, blank, target)
+                    blank = target
+                    self.assertEqual(value, heuristic.evaluate(state))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import random
+import tempfile
+import unittest
+
+from board import Board, MOVES, get_layout
+from search_methods import SearchMethod
+
+# Run from this directory with `python -m pytest` or `python -m unittest`
+
+def replay(board: Board, moves: str) -> int:
+    # Applies a move string to the board and returns the final packed state
+    layout = board.layout
+    state, blank = board.state, board.empty_index
+    for move in moves:
+        target = next(cell for cell, code in layout.moves(blank) if MOVES[code] == move)
+        state, blank = layout.apply_move(state, blank, target), target
+    return state
+
+def scrambled(height: int, width: int, moves: int, seed: int) -> Board:
+    # A solvable board: a seeded random walk of the blank from the goal
+    layout = get_layout(height, width)
+    rng = random.Random(seed)
+    state, blank = layout.goal_state, layout.goal_blank
+    for _ in range(moves):
+        target = rng.choice(layout.neighbors(blank))
+        state, blank = layout.apply_move(state, blank, target), target
+    return Board.from_state(layout, state, blank)
+
+def optimal_length(board: Board) -> int:
+    return len(SearchMethod('manh').a_star(board)[1])
+
+class AnytimeAStarBudgetTest(unittest.TestCase):
+    # With a weight below 1 the search keeps expanding states with a lower f
+    # after the goal has been generated, so a budget that ends the search just
+    # before its last expansion expires with the goal already on the open list
+    BOARD = [[2, 7, 3], [5, 0, 4], [8, 1, 6]]
+    WEIGHT = 0.5
+
+    def test_budget_expires_after_the_goal_was_generated(self):
+        board = Board(self.BOARD)
+        unbounded = SearchMethod('manh', weight=self.WEIGHT)
+        unbounded.anytime_a_star(board)
+        budget = unbounded.processed_count - 1
+
+        search = SearchMethod('manh', weight=self.WEIGHT, node_budget=budget)
+        solution, moves = search.anytime_a_star(board)
+        self.assertIsNotNone(solution)
+        self.assertLessEqual(search.processed_count, budget)
+        self.assertEqual(replay(board, moves), board.layout.goal_state)
+        self.assertEqual(search.weight_used, self.WEIGHT)
+        self.assertGreaterEqual(search.budget_used, 1)
+        self.assertGreaterEqual(search.suboptimality_bound, 1)
+        self.assertLessEqual(len(moves), search.suboptimality_bound * optimal_length(board))
+
+    def test_weighted_a_star_out_of_budget_reports_no_weight(self):
+        search = SearchMethod('manh', weight=2.0, node_budget=3)
+        solution, moves = search.weighted_a_star(Board(self.BOARD))
+        self.assertIsNone(solution)
+        self.assertLessEqual(search.processed_count, 3)
+        self.assertIsNone(search.weight_used)
+        self.assertIsNone(search.suboptimality_bound)
+
+class ParallelAStarTest(unittest.TestCase):
+    # HDA* has to terminate and return a path as short as serial A*'s
+    def test_matches_serial_a_star(self):
+        for height, width, seed in [(2, 3, 1), (3, 3, 2), (3, 3, 3)]:
+            board = scrambled(height, width, 40, seed)
+            with self.subTest(size=f"{height}x{width}", seed=seed):
+                solution, moves = SearchMethod('manh', workers=2).a_star(board)
+                self.assertIsNotNone(solution)
+                self.assertEqual(replay(board, moves), board.layout.goal_state)
+                self.assertEqual(len(moves), optimal_length(board))
+
+    def test_solved_board(self):
+        board = scrambled(3, 3, 0, 0)
+        solution, moves = SearchMethod('manh', workers=2).a_star(board)
+        self.assertIsNotNone(solution)
+        self.assertEqual(moves, "")
+
+class BfsBackendTest(unittest.TestCase):
+    # The layered NumPy and disk backends against the node-by-node deque BFS
+    def backends(self, directory: str):
+        return {'numpy': SearchMethod('LRUD', bfs_backend='numpy'),
+                'disk': SearchMethod('LRUD', bfs_backend='disk', bfs_memory_mb=1, bfs_directory=directory)}
+
+    def test_same_length_as_deque(self):
+        for height, width, seed in [(2, 3, 1), (3, 3, 2), (3, 3, 3)]:
+            board = scrambled(height, width, 40, seed)
+            expected = SearchMethod('LRUD').bfs(board)[1]
+            with tempfile.TemporaryDirectory() as directory:
+                for name, search in self.backends(directory).items():
+                    with self.subTest(backend=name, size=f"{height}x{width}", seed=seed):
+                        solution, moves = search.bfs(board)
+                        self.assertIsNotNone(solution)
+                        self.assertEqual(replay(board, moves), board.layout.goal_state)
+                        self.assertEqual(len(moves), len(expected))
+
+    def test_unsolvable_board_exhausts_the_space(self):
+        # Swapping two tiles of a solvable board makes it unsolvable
+        board = Board([[2, 1, 3], [4, 5, 0]])
+        self.assertIsNone(SearchMethod('LRUD').bfs(board)[0])
+        with tempfile.TemporaryDirectory() as directory:
+            for name, search in self.backends(directory).items():
+                with self.subTest(backend=name):
+                    self.assertIsNone(search.bfs(board)[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import argparse
+import csv
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from board import Board, MOVES, NO_MOVE
+from helpers import read_board
+
+# Batch replacement for dataset/runval.ps1 and puzzleval.jar. Solution files
+# are grouped by instance, so every initial board is read once, and the groups
+# are checked in a process pool. Each move string is replayed on the packed
+# state: every move must keep the blank on the board and the last one must
+# leave the goal. The reported length is then compared with the depth in the
+# file name, which is the optimal length for generated datasets.
+
+SOLUTION_FILENAME = re.compile(r'^([a-zA-Z0-9]+_([0-9]+)_[0-9]+)_([a-zA-Z]+)_([a-zA-Z]+)_sol\.txt$')
+
+# optimal: valid, as long as the depth in the file name
+# longer: valid, but longer than that depth (expected from e.g. dfs)
+# shorter: valid and shorter, so the depth in the file name is not optimal
+# no solution: the solver reported -1
+# invalid: unreadable, illegal move, wrong end state or wrong length
+STATUSES = ['optimal', 'longer', 'shorter', 'no solution', 'invalid']
+
+# (solution file, status, reported length, depth, message)
+Result = Tuple[str, str, int, int, str]
+
+def check_solution(board: Board, solution_file: str, depth: int) -> Result:
+    name = os.path.basename(solution_file)
+    try:
+        with open(solution_file) as f:
+            lines = f.read().split()
+        length = int(lines[0])
+    except (OSError, ValueError, IndexError) as e:
+        return name, 'invalid', -1, depth, f"unreadable solution file: {e}"
+    if length == -1:
+        return name, 'no solution', -1, depth, ""
+    moves = lines[1] if len(lines) > 1 else ""
+    if len(moves) != length:
+        return name, 'invalid', length, depth, f"reported length {length}, but {len(moves)} moves"
+
+    layout = board.layout
+    move_table = layout.move_table("LRUD")
+    state, blank = board.state, board.empty_index
+    for number, move in enumerate(moves, start=1):
+        code = MOVES.find(move.upper())
+        target = next((cell for cell, move_code in move_table[blank][NO_MOVE] if move_code == code), None)
+        if target is None:
+            return name, 'invalid', length, depth, f"move {number} ('{move}') is not legal"
+        state, blank = layout.apply_move(state, blank, target), target
+    if state != layout.goal_state:
+        return name, 'invalid', length, depth, "the moves do not solve the puzzle"
+
+    if length == depth:
+        return name, 'optimal', length, depth, ""
+    return name, 'longer' if length > depth else 'shorter', length, depth, ""
+
+def validate_instance(instance_file: str, solution_files: List[str], depth: int) -> List[Result]:
+    elements = read_board(instance_file) if os.path.exists(instance_file) else None
+    if elements is None:
+        return [(os.path.basename(path), 'invalid', -1, depth,
+                 f"initial board {os.path.basename(instance_file)} missing or unreadable")
+                for path in solution_files]
+    board = Board(elements)
+    return [check_solution(board, path, depth) for path in solution_files]
+
+def collect_solutions(directory: str) -> Dict[Tuple[str, int], List[str]]:
+    # (instance file, depth) -> its solution files
+    groups = defaultdict(list)
+    for path in sorted(Path(directory).iterdir()):
+        match = SOLUTION_FILENAME.match(path.name)
+        if match and path.is_file():
+            groups[(str(path.with_name(f"{match.group(1)}.txt")), int(match.group(2)))].append(str(path))
+    return groups
+
+def validate(directory: str, workers: Optional[int] = None) -> List[Result]:
+    groups = collect_solutions(directory)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Instances are small jobs; send them to the workers in batches
+        chunks = executor.map(validate_instance, [instance for instance, _ in groups],
+                              list(groups.values()), [depth for _, depth in groups], chunksize=64)
+        return [result for chunk in chunks for result in chunk]
+
+def method_of(solution_file: str) -> str:
+    match = SOLUTION_FILENAME.match(solution_file)
+    return f"{match.group(3).lower()} {match.group(4).lower()}"
+
+def print_summary(results: List[Result]):
+    print("----- Summary -----")
+    totals = Counter(status for _, status, _, _, _ in results)
+    for status in STATUSES:
+        print(f"{status.capitalize() + ':':<13} {totals[status]}")
+
+    by_method = defaultdict(Counter)
+    for name, status, _, _, _ in results:
+        by_method[method_of(name)][status] += 1
+    print(f"\n{'method':<14}" + "".join(f"{status:>13}" for status in STATUSES))
+    for method in sorted(by_method):
+        print(f"{method:<14}" + "".join(f"{by_method[method][status]:>13}" for status in STATUSES))
+
+    invalid = [(name, message) for name, status, _, _, message in results if status == 'invalid']
+    if invalid:
+        print("\nInvalid solutions:")
+        for name, message in invalid:
+            print(f"  {name}: {message}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check every size_depth_id_method_strategy_sol.txt file in a "
+                                                 "directory against its initial board")
+    parser.add_argument('directory', help="directory with the instance and solution files")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--report', metavar='FILE', default=None,
+                        help="also write every result to this CSV file")
+    args = parser.parse_args()
+
+    results = validate(args.directory, args.workers)
+    if not results:
+        print(f"No solution files found in {args.directory}")
+        sys.exit(1)
+    print_summary(results)
+    if args.report:
+        with open(args.report, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['solution_file', 'status', 'length', 'depth', 'message'])
+            writer.writerows(results)
+    # Like runval.ps1, fail when any solution is wrong
+    sys.exit(1 if any(status == 'invalid' for _, status, _, _, _ in results) else 0)
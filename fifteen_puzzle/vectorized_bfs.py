@@ -0,0 +1,91 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from board import BoardLayout, MOVES
+
+# Layer-synchronous breadth-first search on NumPy arrays of packed states. A
+# whole depth layer is expanded at once: the successors for each direction are
+# computed with vectorized bit operations on the blank position, duplicates are
+# removed with np.unique and by a sorted lookup in the previous layer (the state
+# graph is bipartite, so a child of layer d can only repeat a state of layer
+# d - 1). Only boards with at most 16 cells fit into uint64 states.
+#
+# Children are kept in the order the deque-based BFS would generate them
+# (parent by parent, directions in strategy order), so both backends return the
+# same path and processed count.
+
+def _move_tables(layout: BoardLayout, search_strategy: str) -> Tuple[np.ndarray, List[int]]:
+    # targets[k][blank] = cell the blank moves to for the k-th direction, or -1
+    codes = [MOVES.index(direction) for direction in dict.fromkeys(search_strategy.upper())
+             if direction in MOVES]
+    targets = np.full((len(codes), layout.size), -1, dtype=np.int64)
+    for blank in range(layout.size):
+        for target, code in layout.moves(blank, search_strategy):
+            targets[codes.index(code), blank] = target
+    return targets, codes
+
+def layered_bfs(layout: BoardLayout, initial_state: int, initial_blank: int, search_strategy: str,
+                progress: Optional[Callable] = None) -> Tuple[Optional[str], int, int, int]:
+    # Returns (move string or None, visited, processed, max depth). `progress`
+    # is called after every layer as progress(processed, visited, frontier, depth).
+    if layout.size > 16:
+        raise ValueError("The vectorized BFS backend supports boards with at most 16 cells")
+
+    targets, codes = _move_tables(layout, search_strategy)
+    goal_state = np.uint64(layout.goal_state)
+    four, fifteen = np.uint64(4), np.uint64(15)
+
+    states = np.array([initial_state], dtype=np.uint64)
+    blanks = np.array([initial_blank], dtype=np.int64)
+    previous_sorted = np.empty(0, dtype=np.uint64)
+    parent_layers = [np.zeros(1, dtype=np.int64)]  # Index of each state's parent in the previous layer
+    code_layers = [np.zeros(1, dtype=np.uint8)]    # Move code that produced each state
+    visited, processed = 1, 0
+
+    depth = 0
+    while True:
+        found = np.flatnonzero(states == goal_state)
+        if found.size:
+            # The deque BFS would stop when popping the goal inside this layer
+            processed += int(found[0]) + 1
+            return _reconstruct(parent_layers, code_layers, int(found[0])), visited, processed, depth
+        processed += states.size
+
+        # Successors as an (n, directions) matrix; invalid moves are masked out
+        child_targets = targets[:, blanks].T
+        valid = child_targets >= 0
+        parent_index, direction = np.nonzero(valid)  # Row-major: parent by parent, in strategy order
+        parent_states = states[parent_index]
+        target_cells = child_targets[parent_index, direction].astype(np.uint64)
+        blank_cells = blanks[parent_index].astype(np.uint64)
+        tiles = (parent_states >> (target_cells * four)) & fifteen
+        children = parent_states ^ (tiles << (target_cells * four)) ^ (tiles << (blank_cells * four))
+
+        # Keep the first occurrence of each new state, then restore generation order
+        unique_children, first = np.unique(children, return_index=True)
+        if previous_sorted.size:
+            positions = np.searchsorted(previous_sorted, unique_children)
+            positions[positions == previous_sorted.size] = 0
+            first = first[previous_sorted[positions] != unique_children]
+        first.sort()
+
+        if not first.size:
+            return None, visited, processed, depth
+
+        previous_sorted = np.sort(states)
+        states = children[first]
+        blanks = target_cells[first].astype(np.int64)
+        parent_layers.append(parent_index[first])
+        code_layers.append(np.array(codes, dtype=np.uint8)[direction[first]])
+        visited += states.size
+        depth += 1
+        if progress is not None:
+            progress(processed, visited, states.size, depth)
+
+def _reconstruct(parent_layers: List[np.ndarray], code_layers: List[np.ndarray], index: int) -> str:
+    moves = []
+    for depth in range(len(parent_layers) - 1, 0, -1):
+        moves.append(MOVES[code_layers[depth][index]])
+        index = int(parent_layers[depth][index])
+    return "".join(reversed(moves))